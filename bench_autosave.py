@@ -0,0 +1,58 @@
+"""
+Otomatik kayıt kodeklerinin karşılaştırması.
+
+Gerçek çizim katmanları (varsayılan: data/auto_saved_drawing.png, debug_overlay_temp.png, r.png)
+üzerinde PNG, zlib seviye 1 ve sıfır-koşu RLE kodeklerinin kodlama/çözme süresini ve çıktı
+boyutunu ölçer. Kullanım:
+
+    python bench_autosave.py [görüntü.png ...]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtGui import QImage
+from PyQt5.QtWidgets import QApplication
+
+from movable import _AUTO_SAVE_CODECS, _encode_tile_pixels, _decode_tile_pixels
+
+DEFAULT_IMAGES = ["data/auto_saved_drawing.png", "debug_overlay_temp.png", "r.png"]
+REPEAT = 5
+
+
+def measure(function, *args):
+    """Fonksiyonu REPEAT kez çalıştırır; en iyi süreyi (ms) ve son sonucu döndürür."""
+    best = None
+    result = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    app = QApplication(sys.argv)  # QImage PNG eklentileri için gerekli
+    paths = sys.argv[1:] or DEFAULT_IMAGES
+    print(f"{'görüntü':<32} {'kodek':<6} {'kodlama ms':>11} {'çözme ms':>9} {'boyut KB':>9}")
+    for path in paths:
+        image = QImage(path)
+        if image.isNull():
+            print(f"{path}: yüklenemedi, atlanıyor")
+            continue
+        image = image.convertToFormat(QImage.Format_ARGB32)
+        raw = image.constBits().asstring(image.byteCount())
+        for codec in _AUTO_SAVE_CODECS:
+            encode_ms, data = measure(_encode_tile_pixels, image, codec)
+            decode_ms, decoded = measure(_decode_tile_pixels, data, codec, image.width(), image.height())
+            if decoded.constBits().asstring(decoded.byteCount()) != raw:
+                print(f"{path}: {codec} kodeki görüntüyü birebir geri üretmedi")
+            name = os.path.basename(path)
+            print(f"{name:<32} {codec:<6} {encode_ms:>11.1f} {decode_ms:>9.1f} {len(data) / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
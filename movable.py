@@ -1,13 +1,26 @@
 import sys
 import os
+import ctypes
+import mmap
 import traceback
 import json
+import atexit
+import collections
 import datetime
-from PyQt5 import QtWidgets, uic
+import functools
+import math
+import queue
+import re
+import struct
+import threading
+import time
+import zlib
+from PyQt5 import QtWidgets, uic, sip
 from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QLabel, QComboBox, QMessageBox, QFrame, QPushButton, \
     QSlider, QFileDialog, QColorDialog, QSpinBox
-from PyQt5.QtCore import Qt, QPoint, QRect, QSize, QTimer, QBuffer, QByteArray
-from PyQt5.QtGui import QColor, QPen, QPainter, QImage, QPixmap, QCursor, QIcon, qAlpha, qRed, qGreen, qBlue
+from PyQt5.QtCore import Qt, QEvent, QPoint, QPointF, QRect, QRectF, QLineF, QSize, QTimer, QBuffer, QByteArray, \
+    QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QColor, QPen, QPainter, QImage, QPixmap, QCursor, QIcon, QPolygonF, QFont, QRegion
 
 # Conditional import for Windows-specific modules
 try:
@@ -27,91 +40,227 @@ except ImportError:
 _DEBUG_MODE_ENABLED = False
 
 
+class LogWriter:
+    """
+    log_error ve _debug_print için arka plan yazıcısı. Çağıran iş parçacığı yalnızca kuyruğa bir kayıt ekler;
+    traceback biçimlendirme, dosya açma/yazma, boyuta göre döndürme ve konsola yazdırma işçi iş parçacığında yapılır.
+    Art arda gelen aynı hata (ör. her fare olayında patlayan bir işleyici) DEDUP_WINDOW_SECONDS boyunca
+    yalnızca sayılır; sayı, farklı bir hata geldiğinde veya kuyruk boşta kaldığında tek satır olarak yazılır.
+    """
+    LOG_DIR = os.path.join(os.path.dirname(__file__), 'logs')
+    ERROR_LOG_FILE = os.path.join(LOG_DIR, 'error_log.txt')
+    ERROR_LOG_MAX_BYTES = 1024 * 1024  # Bu boyutu aşan günlük error_log.txt.1, .2, ... olarak döndürülür
+    ERROR_LOG_BACKUP_COUNT = 3
+    DEDUP_WINDOW_SECONDS = 5.0
+    _queue = queue.Queue()
+    _thread = None
+    _thread_lock = threading.Lock()
+    _dedup_lock = threading.Lock()
+    _last_error = None  # (mesaj, istisna tipi)
+    _last_error_time = 0.0
+    _repeat_count = 0
+
+    @classmethod
+    def _ensure_started(cls):
+        if cls._thread is None or not cls._thread.is_alive():
+            with cls._thread_lock:
+                if cls._thread is None or not cls._thread.is_alive():
+                    cls._thread = threading.Thread(target=cls._run, name="LogWriter", daemon=True)
+                    cls._thread.start()
+
+    @classmethod
+    def _take_repeats(cls):
+        """Sayılan ama henüz yazılmamış tekrarları (kayıt olarak) alır; yoksa None. _dedup_lock altında çağrılır."""
+        if cls._repeat_count == 0:
+            return None
+        record = ("repeat", datetime.datetime.now(), cls._last_error[0], cls._repeat_count)
+        cls._repeat_count = 0
+        return record
+
+    @classmethod
+    def error(cls, message, exception_info=None):
+        """Hata kaydını kuyruğa ekler; pencere içinde tekrarlanan aynı hata yalnızca sayılır."""
+        key = (message, exception_info[0] if exception_info else None)
+        now = time.monotonic()
+        with cls._dedup_lock:
+            if key == cls._last_error and now - cls._last_error_time < cls.DEDUP_WINDOW_SECONDS:
+                cls._repeat_count += 1
+                return
+            repeats = cls._take_repeats()
+            cls._last_error = key
+            cls._last_error_time = now
+        cls._ensure_started()
+        if repeats is not None:
+            cls._queue.put(repeats)
+        # Traceback nesnesi saklanır; biçimlendirme işçide yapılır
+        cls._queue.put(("error", datetime.datetime.now(), message, exception_info))
+
+    @classmethod
+    def debug(cls, text):
+        """Önceden biçimlendirilmiş bir hata ayıklama satırını kuyruğa ekler."""
+        cls._ensure_started()
+        cls._queue.put(("debug", text))
+
+    @classmethod
+    def flush(cls, timeout=2.0):
+        """Kuyruktaki tüm kayıtların yazılmasını bekler (uygulama kapanırken çağrılır)."""
+        if cls._thread is None or not cls._thread.is_alive():
+            return
+        done = threading.Event()
+        with cls._dedup_lock:
+            repeats = cls._take_repeats()
+        if repeats is not None:
+            cls._queue.put(repeats)
+        cls._queue.put(("flush", done))
+        done.wait(timeout)
+
+    @classmethod
+    def _format(cls, record):
+        """Kaydı (dosyaya yazılacak metin, konsol satırı) olarak biçimlendirir."""
+        kind = record[0]
+        if kind == "debug":
+            return None, f"DEBUG: {record[1]}"
+        timestamp = record[1].strftime("%Y-%m-%d %H:%M:%S")
+        if kind == "repeat":
+            _, _, message, count = record
+            return (f"[{timestamp}] Önceki hata {count} kez daha tekrarlandı: {message}\n" + "-" * 50 + "\n\n",
+                    f"Hata {count} kez daha tekrarlandı: {message}")
+        _, _, message, exception_info = record
+        text = f"[{timestamp}] Hata: {message}\n"
+        if exception_info and exception_info[0] is not None:
+            # Hatanın detaylı izi
+            text += "Hata Detayı:\n" + "".join(traceback.format_exception(*exception_info))
+        return text + "-" * 50 + "\n\n", f"Hata günlüğe kaydedildi: {message}"
+
+    @classmethod
+    def _rotate_if_needed(cls, incoming_bytes):
+        """Günlük dosyası ERROR_LOG_MAX_BYTES'ı aşacaksa eski dosyaları bir numara kaydırır."""
+        try:
+            size = os.path.getsize(cls.ERROR_LOG_FILE)
+        except OSError:
+            return
+        if size + incoming_bytes <= cls.ERROR_LOG_MAX_BYTES:
+            return
+        for index in range(cls.ERROR_LOG_BACKUP_COUNT - 1, 0, -1):
+            source = f"{cls.ERROR_LOG_FILE}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{cls.ERROR_LOG_FILE}.{index + 1}")
+        os.replace(cls.ERROR_LOG_FILE, f"{cls.ERROR_LOG_FILE}.1")
+
+    @classmethod
+    def _write(cls, records):
+        """Bir kayıt grubunu tek dosya açılışıyla yazar ve konsola basar."""
+        texts = []
+        for record in records:
+            text, console_line = cls._format(record)
+            if text is not None:
+                texts.append(text)
+            print(console_line)  # Hata mesajları her zaman, hata ayıklama satırları debug_mode'da basılır
+        if not texts:
+            return
+        data = "".join(texts)
+        os.makedirs(cls.LOG_DIR, exist_ok=True)  # logs klasörünü oluştur (varsa atla)
+        cls._rotate_if_needed(len(data.encode('utf-8')))
+        with open(cls.ERROR_LOG_FILE, 'a', encoding='utf-8') as f:
+            f.write(data)
+
+    @classmethod
+    def _run(cls):
+        while True:
+            try:
+                records = [cls._queue.get(timeout=cls.DEDUP_WINDOW_SECONDS)]
+            except queue.Empty:
+                # Boşta: sayılmış tekrarları yaz
+                with cls._dedup_lock:
+                    repeats = cls._take_repeats()
+                records = [repeats] if repeats is not None else []
+            # Biriken kayıtlar tek seferde yazılır
+            while True:
+                try:
+                    records.append(cls._queue.get_nowait())
+                except queue.Empty:
+                    break
+            waiters = [record[1] for record in records if record[0] == "flush"]
+            try:
+                cls._write([record for record in records if record[0] != "flush"])
+            except Exception as e:
+                print(f"Hata günlüğü yazılamadı: {e}")
+            for done in waiters:
+                done.set()
+
+
 def _debug_print(*args, **kwargs):
     """
     Prints messages only if _DEBUG_MODE_ENABLED is True.
+    Bayrak kapalıyken hiçbir metin birleştirme yapılmaz; açıkken satır arka plan yazıcısı üzerinden basılır.
     """
     if _DEBUG_MODE_ENABLED:
-        print("DEBUG:", *args, **kwargs)
+        LogWriter.debug(kwargs.get("sep", " ").join(str(arg) for arg in args))
 
 
 def log_error(error_message, exception_info=None):
     """
     Kritik uygulama hatalarını bir günlük dosyasına kaydeder.
+    Yalnızca kuyruğa ekler; yazma LogWriter işçisinde yapılır, tekrarlanan aynı hata sayılarak birleştirilir.
     """
-    log_dir = os.path.join(os.path.dirname(__file__), 'logs')
-    os.makedirs(log_dir, exist_ok=True)  # logs klasörünü oluştur (varsaysa atla)
+    LogWriter.error(error_message, exception_info)
 
-    log_file_path = os.path.join(log_dir, 'error_log.txt')
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    with open(log_file_path, 'a', encoding='utf-8') as f:
-        f.write(f"[{timestamp}] Hata: {error_message}\n")
-        if exception_info:
-            # traceback.format_exc() ile hatanın detaylı izini al
-            f.write("Hata Detayı:\n")
-            f.write(traceback.format_exc())
-        f.write("-" * 50 + "\n\n")
-    # Always print error messages
-    print(f"Hata günlüğe kaydedildi: {error_message}")
+atexit.register(LogWriter.flush)
 
 
-def _check_qimage_for_visible_content(image: QImage) -> bool:
+def _visible_content_rect(image: QImage) -> QRect:
     """
-    Checks if a QImage contains any non-transparent or non-zero color pixels.
-    Returns True if visible content is found, False otherwise.
+    Görüntüdeki görünür piksellerin (ARGB32'de sıfır olmayan piksel, alfasız formatlarda siyah olmayan piksel)
+    sıkı sınır dikdörtgenini döndürür; görünür içerik yoksa boş bir QRect döner.
+    Tarama piksel piksel değil, ham tampon üzerinde C düzeyindeki bayt işlemleriyle yapılır: her satır
+    boş bir satırla karşılaştırılır (memcmp), içerik bulunan satırlar tamsayı olarak OR'lanıp sütun aralığı bulunur.
     """
     if image.isNull():
-        _debug_print("Image is null, no visible content.")
-        return False
-
-    # For ARGB32, transparent is 0x00000000. Any other value indicates content.
-    # We will directly check the raw pixel data for non-zero bytes.
-    if image.format() == QImage.Format_ARGB32:
-        try:
-            # Access raw pixel data as a memoryview and check for any non-zero byte
-            # This is a faster and more robust check for ARGB32 images.
-            data = image.constBits().asarray(image.byteCount())
-            if any(byte != 0 for byte in data):
-                _debug_print("ARGB32 image has non-zero bytes, visible content found.")
-                return True
-            else:
-                _debug_print("ARGB32 image contains only zero bytes (fully transparent).")
-                return False
-        except Exception as e:
-            # Fallback to pixel-by-pixel if raw access fails for some reason
-            _debug_print(f"Error accessing raw image bits ({e}), falling back to pixel-by-pixel check.")
-            log_error(f"Error accessing raw image bits in _check_qimage_for_visible_content: {e}", sys.exc_info())
+        return QRect()
 
-    # Fallback/general pixel-by-pixel check for other formats or if raw access failed
     if image.hasAlphaChannel():
-        for y in range(image.height()):
-            for x in range(image.width()):
-                pixel_rgb = image.pixel(x, y)
-                alpha = qAlpha(pixel_rgb)
-                if alpha != 0:
-                    # Also check if color components are not all zero, to exclude transparent black on transparent background.
-                    # However, if alpha is non-zero, it usually means it's visible.
-                    # We prioritize alpha being non-zero for 'visible content' as per Qt's transparency model.
-                    if qRed(pixel_rgb) != 0 or qGreen(pixel_rgb) != 0 or qBlue(pixel_rgb) != 0:
-                        _debug_print(f"Pixel-by-pixel: Visible alpha {alpha} and color at ({x},{y})")
-                        return True
-                    elif alpha == 255:  # Fully opaque black is also visible content
-                        if qRed(pixel_rgb) == 0 and qGreen(pixel_rgb) == 0 and qBlue(pixel_rgb) == 0:
-                            _debug_print(f"Pixel-by-pixel: Fully opaque black found at ({x},{y})")
-                            return True
-        _debug_print("Image with alpha channel: no visible alpha or non-black opaque content found.")
-        return False
+        if image.format() != QImage.Format_ARGB32:
+            image = image.convertToFormat(QImage.Format_ARGB32)
+        raw = image.constBits().asstring(image.byteCount())
     else:
-        # For images without alpha, check for any non-black pixel
-        for y in range(image.height()):
-            for x in range(image.width()):
-                pixel_rgb = image.pixel(x, y)
-                if qRed(pixel_rgb) != 0 or qGreen(pixel_rgb) != 0 or qBlue(pixel_rgb) != 0:
-                    _debug_print(f"Pixel-by-pixel: Visible color at ({x},{y})")
-                    return True
-        _debug_print("Image without alpha channel: only black pixels found.")
+        # Alfasız görüntülerde alfa baytı her zaman 0xFF'dir; yalnızca renk baytlarına bakılır
+        image = image.convertToFormat(QImage.Format_RGB32)
+        pixels = bytearray(image.constBits().asstring(image.byteCount()))
+        pixels[3::4] = bytes(len(pixels) // 4)
+        raw = bytes(pixels)
+
+    bytes_per_line = image.bytesPerLine()
+    empty_row = bytes(bytes_per_line)
+    top = bottom = None
+    columns = 0  # İçerik bulunan satırların OR'u: sıfır olmayan baytlar içerikli sütunları gösterir
+    for y in range(image.height()):
+        row = raw[y * bytes_per_line:(y + 1) * bytes_per_line]
+        if row != empty_row:
+            if top is None:
+                top = y
+            bottom = y
+            columns |= int.from_bytes(row, 'big')
+    if top is None:
+        return QRect()
+
+    row = columns.to_bytes(bytes_per_line, 'big')
+    left = (bytes_per_line - len(row.lstrip(b"\0"))) // 4
+    right = (len(row.rstrip(b"\0")) - 1) // 4
+    return QRect(left, top, right - left + 1, bottom - top + 1)
+
+
+def _check_qimage_for_visible_content(image: QImage) -> bool:
+    """
+    Checks if a QImage contains any non-transparent or non-zero color pixels.
+    Returns True if visible content is found, False otherwise.
+    """
+    content_rect = _visible_content_rect(image)
+    if content_rect.isEmpty():
+        _debug_print("Image has no visible content (null or fully transparent/black).")
         return False
+    _debug_print(f"Visible content found, bounding rect: {content_rect}")
+    return True
 
 
 class CursorManager:
@@ -198,7 +347,18 @@ class CursorManager:
 
 _SCRIPT_DIR = os.path.dirname(__file__)
 # Otomatik kaydetme dosyası adı ve yolu güncellendi
-_AUTO_SAVE_DRAWING_FILE = os.path.join(_SCRIPT_DIR, 'data', 'auto_saved_drawing.png')
+_AUTO_SAVE_DRAWING_FILE = os.path.join(_SCRIPT_DIR, 'data', 'auto_saved_drawing.png')  # Eski tam PNG kayıt
+# Karo tabanlı artımlı otomatik kayıt dosyası (TiledAutoSaveFile)
+_AUTO_SAVE_TILES_FILE = os.path.join(_SCRIPT_DIR, 'data', 'auto_saved_drawing.tiles')
+# Oturum günlüğü; temiz kapanışta silinir. Açılışta hâlâ duruyorsa önceki oturum çökmüştür.
+_SESSION_JOURNAL_FILE = os.path.join(_SCRIPT_DIR, 'data', 'session_journal.bin')
+_SESSION_JOURNAL_RECOVERY_FILE = os.path.join(_SCRIPT_DIR, 'data', 'session_journal.recover.bin')
+# Kurtarma dosyası kullanılmadan yeni bir çökme olursa önceki kurtarma dosyası ezilmez, numaralı dosyaya yazılır
+_SESSION_JOURNAL_RECOVERY_PATTERN = re.compile(r"session_journal\.recover(?:\.(\d+))?\.bin$")
+# Bellek eşlemeli çizim katmanı ("overlay_backing_store": "mmap"). Açılışta önceki oturumun dosyası
+# _OVERLAY_BACKING_PREVIOUS_FILE olarak saklanır; 'Yükle' butonu onu doğrudan eşler.
+_OVERLAY_BACKING_FILE = os.path.join(_SCRIPT_DIR, 'data', 'overlay_backing.bin')
+_OVERLAY_BACKING_PREVIOUS_FILE = os.path.join(_SCRIPT_DIR, 'data', 'overlay_backing.prev.bin')
 
 
 class Ui(QMainWindow):
@@ -328,6 +488,9 @@ class Ui(QMainWindow):
             self.size_combo.setCurrentIndex(2)  # Default to 5px
             self.size_combo.currentIndexChanged.connect(self.set_size)
 
+        # Çizim oturumlarının anında açılması için gizli çizim pencerelerini önceden hazırla
+        PaintSessionPool.schedule_prewarm(self)
+
     def load_pen_colors_from_config(self):
         """
         Loads pen colors from app_config.json and connects them to buttons in the main UI.
@@ -404,6 +567,35 @@ class Ui(QMainWindow):
                 if "initial_smoothing_factor" not in config_data:
                     config_data["initial_smoothing_factor"] = 5  # Default smoothing factor
 
+                # Undo geçmişi için bellek bütçesi (MB)
+                if "undo_memory_budget_mb" not in config_data:
+                    config_data["undo_memory_budget_mb"] = 256
+
+                # Otomatik kayıt karo kodeki: "zlib" (hızlı), "rle" (en hızlı) veya "png"
+                if "auto_save_codec" not in config_data:
+                    config_data["auto_save_codec"] = "zlib"
+
+                # Çizim katmanı deposu: "memory" veya "mmap" (bellek eşlemeli dosya, düşük RAM'li makineler için)
+                if "overlay_backing_store" not in config_data:
+                    config_data["overlay_backing_store"] = "memory"
+
+                # Yumuşatma açıkken kalem darbelerine uygulanan filtreler ve tahmin ufku (ms, 0: kapalı)
+                if "stroke_filters" not in config_data:
+                    config_data["stroke_filters"] = ["one_euro", "catmull_rom"]
+                if "stroke_prediction_ms" not in config_data:
+                    config_data["stroke_prediction_ms"] = 8
+
+                # Tam ekran çizimde yakalanan ekranlar: "all" (tüm sanal masaüstü), "primary" veya "cursor"
+                if "capture_screens" not in config_data:
+                    config_data["capture_screens"] = "all"
+
+                # Ekran görüntüsü çözünürlüğü: "native" (cihaz pikselleri, HiDPI'da keskin) veya "logical";
+                # screenshot_max_size piksel üst sınırıdır ([0, 0]: sınırsız, eski davranış için [1920, 1080])
+                if "screenshot_resolution" not in config_data:
+                    config_data["screenshot_resolution"] = "native"
+                if "screenshot_max_size" not in config_data:
+                    config_data["screenshot_max_size"] = [0, 0]
+
                 return config_data
         except FileNotFoundError:
             error_msg = f"Hata: Uygulama yapılandırma dosyası bulunamadı: {config_path}"
@@ -419,7 +611,17 @@ class Ui(QMainWindow):
                 "tool_ui_file": "pen_tool.ui",
                 "tool_window_position": {"x_offset_from_paint_window": -20, "y_offset_from_paint_window": 20},
                 "pen_colors": ["#FF0000", "#0000FF", "#000000", "#008000", "#800080", "#FFA500"],
-                "initial_smoothing_factor": 5
+                "initial_smoothing_factor": 5,
+                "undo_memory_budget_mb": 256,
+                "auto_save_codec": "zlib",
+                "overlay_backing_store": "memory",
+                "stroke_filters": ["one_euro", "catmull_rom"],
+                "stroke_prediction_ms": 8,
+                "capture_screens": "all",
+                "screenshot_resolution": "native",
+                "screenshot_max_size": [0, 0],
+                "paint_window_pool_size": 1,
+                "region_selector_loupe": True
             }
             try:
                 os.makedirs(os.path.dirname(config_path), exist_ok=True)
@@ -475,8 +677,21 @@ class Ui(QMainWindow):
         """Hides the main window and opens the region selection tool."""
         try:
             self.hide()  # Hide the main window, do not close it
+            # Seçici açılırken ekranı yakalar; gizlenen (compositor'da solan) ana pencere kareye girmesin diye
+            # yakalama, gizleme işlendikten sonra yapılır
+            QTimer.singleShot(RegionSelector.CAPTURE_DELAY_MS, self._show_region_selector)
+        except Exception as e:
+            error_msg = f"Bölge seçici açılırken hata oluştu: {e}"
+            # Always print errors
+            print(error_msg)
+            log_error(error_msg, sys.exc_info())
+            self.show()  # Hata olursa ana pencereyi tekrar göster
+
+    def _show_region_selector(self):
+        """Ana pencere gizlendikten sonra ekranı yakalayan bölge seçiciyi oluşturur ve gösterir."""
+        try:
             self.selector = RegionSelector(self.active_color, self.active_size, self)  # Pass main window reference
-            self.selector.showFullScreen()
+            _show_spanning(self.selector, self.selector.geometry())
         except Exception as e:
             error_msg = f"Bölge seçici açılırken hata oluştu: {e}"
             # Always print errors
@@ -560,20 +775,25 @@ class Ui(QMainWindow):
         """Hides the main window and starts a full-screen paint session."""
         try:
             self.hide()
-            screenshot = self._capture_screenshot_pixmap()
+            screenshot, capture_rect, layout = self._capture_screenshot_pixmap()
             if screenshot:
                 try:
                     # Ensure initial_brush_color passed to PaintCanvasWindow has full opacity for pen tool
                     initial_paint_color = QColor(self.active_color)
                     initial_paint_color.setAlpha(255)  # Force full opacity for the initial launch of the paint window
 
-                    self.paint_window = PaintCanvasWindow(
+                    self.paint_window = PaintSessionPool.acquire(
+                        self,  # Pass main window reference
                         screenshot,
                         initial_paint_color,  # Use the modified color with full alpha
                         self.active_size,
-                        self  # Pass main window reference
+                        capture_rect
                     )
-                    self.paint_window.showFullScreen()
+                    _show_spanning(self.paint_window, capture_rect)
+                    if not layout.is_exact():
+                        # Tuval hızlı ölçeklenmiş görüntüyle hemen açılır; yumuşak ölçekleme bitince yerine geçer
+                        self.paint_window.refine_background(BackgroundImageTask(layout.compose, True),
+                                                            layout.device_pixel_ratio())
                 except Exception as e:
                     error_msg = f"Tam ekran çizim penceresi oluşturulurken hata oluştu: {e}"
                     # Always print errors
@@ -592,37 +812,243 @@ class Ui(QMainWindow):
     def _capture_screenshot_pixmap(self):
         """
         Captures a full-screen screenshot as a QPixmap.
-        Handles platform-specific screenshotting.
+        'capture_screens' ayarındaki ekranlar yakalanıp sanal masaüstü koordinatlarında birleştirilir. Dönen
+        pixmap hızlı (en yakın komşu) ölçeklenmiştir ve devicePixelRatio ile etiketlidir; yumuşak ölçekleme
+        layout.compose(True) ile bir işçide yapılır. Tuvalin arka planı tek bir görsel olduğundan karışık DPI'lı
+        ekranlarda düşük yoğunluklu ekranlar en yüksek orana ölçeklenir (bkz. ScreenshotLayout).
+        (pixmap, sanal masaüstü dikdörtgeni, ScreenshotLayout) döndürür, hata olursa (None, QRect(), None).
         """
         try:
-            screen = QApplication.primaryScreen()
-            # Use grabWindow for entire screen (root window ID 0)
-            pixmap = screen.grabWindow(0)
-
-            # Resize to a max resolution for performance if it's too large
-            screen_rect = screen.geometry()
-            max_width = 1920
-            max_height = 1080
-
-            # Only scale down if current pixmap is larger than the max resolution
-            if pixmap.width() > max_width or pixmap.height() > max_height:
-                pixmap = pixmap.scaled(QSize(max_width, max_height),
-                                       Qt.KeepAspectRatio,
-                                       Qt.SmoothTransformation)
-            return pixmap
+            screens = _screens_for_capture(self.app_config.get("capture_screens", "all"))
+            layout = _grab_screenshot(screens, _virtual_rect(screens), self.app_config)
+            return _pixmap_with_ratio(layout.compose(False), layout.device_pixel_ratio()), layout.logical_rect, layout
         except Exception as e:
             error_msg = f"Ekran görüntüsü alınamadı: {e}"
             # Always print errors
             print(error_msg)
             log_error(error_msg, sys.exc_info())
             QMessageBox.critical(self, "Ekran Görüntüsü Hatası", "Ekran görüntüsü alınamadı.")
-            return None
+            return None, QRect(), None
+
+
+class ScreenCaptureTask(QRunnable):
+    """
+    Bir ekranın yakalanan görüntüsünü birleştirilmiş ekran görüntüsündeki hedef boyutuna yumuşak ölçekleyen iş.
+    QImage iş parçacığı güvenli olduğundan ekranlar paralel işlenir.
+    """
+
+    def __init__(self, image, size):
+        super().__init__()
+        self.image = image
+        self.size = size
+        self.result = None
+
+    def run(self):
+        try:
+            if self.image.isNull():
+                return  # Yakalama başarısız; bu ekranın alanı siyah kalır
+            image = self.image.convertToFormat(QImage.Format_RGB32)
+            if image.size() != self.size:
+                image = image.scaled(self.size, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+            self.result = image
+        except Exception as e:
+            log_error(f"Ekran görüntüsü işlenirken hata: {e}", sys.exc_info())
+
+
+class BackgroundImageSignals(QObject):
+    """BackgroundImageTask'ın sonucu GUI iş parçacığına bildirdiği sinyal."""
+    finished = pyqtSignal(object, QImage)  # iş, sonuç görüntüsü
+
+
+class BackgroundImageTask(QRunnable):
+    """
+    function(*args) ile bir QImage üreten (ör. yumuşak ölçekleme) ve sonucu sinyalle bildiren arka plan işi.
+    Sinyal her durumda gönderilir (hata olursa boş QImage ile); böylece işi tutan taraf onu bırakabilir.
+    """
+
+    def __init__(self, function, *args):
+        super().__init__()
+        self.function = function
+        self.args = args
+        self.signals = BackgroundImageSignals()
+
+    def run(self):
+        image = None
+        try:
+            image = self.function(*self.args)
+        except Exception as e:
+            log_error(f"Arka plan görüntü işi sırasında hata: {e}", sys.exc_info())
+        self.signals.finished.emit(self, image if image is not None else QImage())
+
+
+def _smooth_scaled(image, size):
+    """Görüntüyü tam olarak size boyutuna yumuşak ölçekler (BackgroundImageTask ile kullanılır)."""
+    return image.scaled(size, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+
+
+def _pixmap_with_ratio(image, device_pixel_ratio):
+    """QImage'dan, mantıksal boyutu piksel boyutu / device_pixel_ratio olan bir QPixmap oluşturur."""
+    pixmap = QPixmap.fromImage(image)
+    pixmap.setDevicePixelRatio(device_pixel_ratio)
+    return pixmap
+
+
+def _screens_for_capture(mode):
+    """'capture_screens' ayarına göre yakalanacak QScreen listesi: "all", "primary" veya "cursor"."""
+    if mode == "all":
+        return QApplication.screens()
+    if mode == "cursor":
+        return [QApplication.screenAt(QCursor.pos()) or QApplication.primaryScreen()]
+    if mode != "primary":
+        log_error(f"Geçersiz 'capture_screens' değeri app_config.json'da: {mode}")
+    return [QApplication.primaryScreen()]
+
+
+def _virtual_rect(screens):
+    """Ekranların sanal masaüstündeki geometrilerinin birleşimi."""
+    rect = QRect()
+    for screen in screens:
+        rect = rect.united(screen.geometry())
+    return rect
+
+
+class ScreenshotLayout:
+    """
+    Ekranlardan yakalanan parçalar ve sanal masaüstündeki (logical_rect) yerleşimleri. Her parça kendi ekranının
+    piksel yoğunluğunda (devicePixelRatio) saklanır; karışık DPI'lı ekranlarda (ör. 1x 1080p yanında 2x 4K)
+    1x ekran büyütülmez ve HiDPI ekran diğerine yer açmak için küçültülmez. Tek bir görüntüye birleştirme
+    (compose) yalnızca istenen alan için yapılır ve o alanla kesişen ekranların en yüksek oranını kullanır
+    (max_size ile sınırlı); yalnızca bu orandan düşük yoğunluktaki ekranların payı ölçeklenir.
+    """
+
+    def __init__(self, logical_rect, parts, max_size=None):
+        self.logical_rect = logical_rect
+        self.parts = parts  # [(yakalanan QImage, sanal masaüstündeki QRect, ekranın devicePixelRatio'su)]
+        self.max_size = max_size  # Birleştirilmiş görüntünün piksel üst sınırı (QSize) veya None
+
+    def _area(self, rect):
+        """Birleştirilecek alan: rect (varsayılan: tüm yerleşim), yerleşimle sınırlı."""
+        return QRect(self.logical_rect) if rect is None else rect.intersected(self.logical_rect)
+
+    def device_pixel_ratio(self, rect=None):
+        """rect birleştirilirken kullanılan oran: kesişen ekranların en yükseği, max_size'a sığacak şekilde."""
+        area = self._area(rect)
+        ratio = max((part_ratio for _, target, part_ratio in self.parts if target.intersects(area)), default=1.0)
+        if self.max_size is not None and not area.isEmpty():
+            ratio = min(ratio, self.max_size.width() / area.width(), self.max_size.height() / area.height())
+        return ratio
+
+    def _pieces(self, area, ratio):
+        """Alanla kesişen her parça için (görüntü, görüntüdeki kaynak QRect, birleştirilmiş görüntüdeki hedef QRect)."""
+        pieces = []
+        for image, target, _ in self.parts:
+            part = target.intersected(area)
+            if part.isEmpty() or image.isNull():
+                continue
+            # Yakalanan görüntünün gerçek ölçeği (ekranın oranından farklı gelebilir)
+            scale_x = image.width() / target.width()
+            scale_y = image.height() / target.height()
+            source = QRect(round((part.x() - target.x()) * scale_x), round((part.y() - target.y()) * scale_y),
+                           round(part.width() * scale_x), round(part.height() * scale_y))
+            destination = QRect(round((part.x() - area.x()) * ratio), round((part.y() - area.y()) * ratio),
+                                round(part.width() * ratio), round(part.height() * ratio))
+            pieces.append((image, source, destination))
+        return pieces
+
+    def is_exact(self, rect=None):
+        """rect'teki tüm parçalar birleştirme oranında yakalandıysa (ör. tek ekran, sınır yok) ölçeklemeye gerek yoktur."""
+        area = self._area(rect)
+        return all(source.size() == destination.size()
+                   for _, source, destination in self._pieces(area, self.device_pixel_ratio(area)))
+
+    def compose(self, smooth, rect=None):
+        """
+        rect alanını (varsayılan: tüm yerleşim) device_pixel_ratio(rect) oranında tek görüntüde birleştirir.
+        smooth=False: en yakın komşu ölçekleme, GUI iş parçacığında tuvalin hemen açılması için. smooth=True:
+        ölçeklenecek her parça ayrı bir işçide yumuşak ölçeklenir (BackgroundImageTask'ta çalışır).
+        Hiçbir ekranın kapsamadığı alanlar (farklı boyutlu monitörlerde) siyah kalır.
+        """
+        area = self._area(rect)
+        ratio = self.device_pixel_ratio(area)
+        pieces = self._pieces(area, ratio)
+        if smooth:
+            pool = QThreadPool()
+            pool.setMaxThreadCount(max(1, len(pieces)))
+            tasks = []
+            for index, (image, source, destination) in enumerate(pieces):
+                if source.size() == destination.size():
+                    continue
+                task = ScreenCaptureTask(image.copy(source), destination.size())
+                task.setAutoDelete(False)  # Sonuç birleştirmede okunur
+                tasks.append((index, task))
+                pool.start(task)
+            pool.waitForDone()
+            for index, task in tasks:
+                if task.result is not None:
+                    pieces[index] = (task.result, task.result.rect(), pieces[index][2])
+
+        desktop = QImage(round(area.width() * ratio), round(area.height() * ratio), QImage.Format_RGB32)
+        desktop.fill(Qt.black)
+        painter = QPainter(desktop)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        for image, source, destination in pieces:
+            painter.drawImage(destination, image, source)  # Boyutlar farklıysa hızlı (en yakın komşu) ölçekleme
+        painter.end()
+        return desktop
+
+
+def _grab_screenshot(screens, capture_rect, app_config):
+    """
+    Ekranların capture_rect (sanal masaüstü koordinatları) ile kesişen kısımlarını yakalar. grabWindow Qt gereği
+    GUI iş parçacığında çağrılır; ölçekleme ve birleştirme ScreenshotLayout'ta yapılır.
+    'screenshot_resolution' "native" ise her parça kendi ekranının oranını alır ("logical": 1); 'screenshot_max_size'
+    yakalamayı değil, birleştirilmiş görüntünün boyutunu sınırlar.
+    """
+    resolution = app_config.get("screenshot_resolution", "native")
+    max_width, max_height = app_config.get("screenshot_max_size", [0, 0])
+    max_size = QSize(max_width, max_height) if max_width > 0 and max_height > 0 else None
+
+    parts = []
+    for screen in screens:
+        geometry = screen.geometry()
+        part = geometry.intersected(capture_rect)
+        if part.isEmpty():
+            continue
+        # Use grabWindow for the screen (root window ID 0); koordinatlar ekrana göre
+        image = screen.grabWindow(0, part.x() - geometry.x(), part.y() - geometry.y(),
+                                  part.width(), part.height()).toImage()
+        ratio = screen.devicePixelRatio() if resolution == "native" else 1.0
+        parts.append((image, part, ratio))
+    _debug_print(f"{len(parts)} ekran yakalandı: {capture_rect}, oranlar: {[ratio for _, _, ratio in parts]}")
+    return ScreenshotLayout(QRect(capture_rect), parts, max_size)
+
+
+def _show_spanning(window, rect):
+    """
+    Pencereyi rect'i kaplayacak şekilde gösterir. showFullScreen() pencereyi tek bir ekranla sınırladığı için
+    birden fazla ekranı kaplayan pencere çerçevesiz olarak doğrudan sanal masaüstü geometrisinde açılır.
+    """
+    screen = QApplication.screenAt(rect.center())
+    if screen is not None and screen.geometry() == rect:
+        window.showFullScreen()
+    else:
+        window.setGeometry(rect)
+        window.show()
 
 
 class RegionSelector(QWidget):
     """
     Allows the user to select a rectangular region on the screen for screenshotting.
+    Ekran, seçici açılırken bir kez yakalanır ve dondurulmuş kare olarak gösterilir; seçilen bölge bu kareden
+    kırpılır. Böylece ikinci bir yakalama yapılmaz ve kapanmakta olan seçici görüntüye girmez.
     """
+    DIM_COLOR = QColor(128, 128, 128, 77)  # Dondurulmuş karenin üzerindeki yarı saydam gri örtü
+    CAPTURE_DELAY_MS = 200  # Ana pencere gizlendikten sonra yakalamadan önceki bekleme (compositor solma animasyonu)
+    SELECTION_PEN_WIDTH = 2
+    LOUPE_SOURCE_PIXELS = 15  # Büyüteçte gösterilen kare alanın kenarı (fiziksel piksel, tek sayı: merkez piksel)
+    LOUPE_ZOOM = 8  # Büyütme oranı; büyüteç LOUPE_SOURCE_PIXELS * LOUPE_ZOOM mantıksal piksel olur
+    LOUPE_OFFSET = 24  # Büyütecin imleçten uzaklığı
+    LOUPE_LABEL_HEIGHT = 16  # Büyütecin altındaki koordinat şeridi
 
     def __init__(self, brush_color, brush_size, main_window_ref):  # Get main window reference
         super().__init__()
@@ -631,24 +1057,137 @@ class RegionSelector(QWidget):
         self.main_window_ref = main_window_ref  # Store the reference
 
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
-        self.setWindowOpacity(0.3)  # Translucent overlay
-        self.setStyleSheet("background-color: gray;")
+        self.setAttribute(Qt.WA_OpaquePaintEvent)  # Dondurulmuş kare tüm pencereyi kaplar
         self.begin = QPoint()
         self.end = QPoint()
         # İmleci CursorManager'dan çekiyoruz
         self.setCursor(CursorManager.get_cursor("region_select"))
 
-        # Set geometry to cover the primary screen
-        screen = QApplication.primaryScreen().geometry()
-        self.setGeometry(screen)
+        # Tüm ekranları bir kez yakala; seçim yenilense de aynı kare kullanılır
+        screens = QApplication.screens()
+        self.frame_layout = _grab_screenshot(screens, _virtual_rect(screens), self.main_window_ref.app_config)
+        # Kare, sanal masaüstü boyunca tek bir görüntüye birleştirilmez: her ekranın yakalaması kendi piksel
+        # yoğunluğunda kalır (karartılmamış tek kopya) ve pencere koordinatlarındaki alanına çizilir.
+        # Karartılmış kopya ekran başına bir kez hazırlanır; seçimin içi boyanırken karartılmamış kareden "oyulur"
+        origin = self.frame_layout.logical_rect.topLeft()
+        self._frame_parts = []  # [(pencere koordinatlarındaki QRect, yakalanan QImage, karartılmış QPixmap)]
+        uncovered = QRegion(QRect(QPoint(), self.frame_layout.logical_rect.size()))
+        for image, target, _ in self.frame_layout.parts:
+            if image.isNull():
+                continue  # Yakalama başarısız; bu ekranın alanı siyah kalır
+            dimmed = QPixmap.fromImage(image)
+            painter = QPainter(dimmed)
+            painter.fillRect(dimmed.rect(), self.DIM_COLOR)  # Fiziksel boyut mantıksal alanı da kapsar
+            painter.end()
+            rect = target.translated(-origin)
+            self._frame_parts.append((rect, image, dimmed))
+            uncovered = uncovered.subtracted(QRegion(rect))
+        self._uncovered = uncovered  # Hiçbir ekranın kapsamadığı alan (farklı boyutlu monitörlerde) siyah boyanır
+
+        # İsteğe bağlı büyüteç: imlecin çevresindeki küçük alan, kareden kesilip önbelleğe alınır ve büyütülerek çizilir
+        self.loupe_enabled = bool(self.main_window_ref.app_config.get("region_selector_loupe", True))
+        self._loupe_center = None  # Önbellekteki alanın merkezi (ekran indeksi, ekranın fiziksel pikseli)
+        self._loupe_source = None  # Önbellekteki alan (QImage)
+        self._loupe_rect = QRect()  # Büyütecin pencere içindeki alanı (koordinat şeridi dahil)
+        self._loupe_pos = QPoint()  # İmlecin konumu
+        self.setMouseTracking(self.loupe_enabled)  # Büyüteç düğme basılı değilken de imleci izler
+
+        # Set geometry to cover every screen (sanal masaüstü)
+        self.setGeometry(self.frame_layout.logical_rect)
+
+    def _selection_rect(self):
+        """Seçim dikdörtgeni; seçim yoksa boş."""
+        if self.begin == self.end:
+            return QRect()
+        return QRect(self.begin, self.end).normalized()
+
+    def _border_region(self, rect):
+        """Seçim çerçevesinin kapladığı alan (kalem kalınlığı payıyla)."""
+        if rect.isEmpty():
+            return QRegion()
+        margin = self.SELECTION_PEN_WIDTH + 1
+        return QRegion(rect.adjusted(-margin, -margin, margin, margin)).subtracted(
+            QRegion(rect.adjusted(margin, margin, -margin, -margin)))
+
+    def _set_selection(self, begin, end):
+        """
+        Seçimi günceller ve yalnızca değişen alanı yeniden boyanmak üzere işaretler: eski ve yeni çerçeveler ile
+        iki dikdörtgen arasında karartması değişen şerit (tam ekran yeniden boyama yapılmaz).
+        """
+        old_rect = self._selection_rect()
+        self.begin = begin
+        self.end = end
+        new_rect = self._selection_rect()
+        if new_rect == old_rect:
+            return
+        dirty = QRegion(old_rect).xored(QRegion(new_rect))
+        dirty = dirty.united(self._border_region(old_rect)).united(self._border_region(new_rect))
+        self.update(dirty)
+
+    def _move_loupe(self, pos):
+        """Büyüteci imlecin yanına taşır; kaynak alan yalnızca imleç başka bir kare pikseline geçince yeniden kesilir."""
+        # Büyüteç, imlecin bulunduğu ekranın yakalamasından o ekranın fiziksel pikselleriyle örneklenir
+        index = next((i for i, part in enumerate(self._frame_parts) if part[0].contains(pos)), None)
+        if index is None:
+            center = None
+        else:
+            rect, image, _ = self._frame_parts[index]
+            center = (index, QPoint(int((pos.x() - rect.x()) * image.width() / rect.width()),
+                                    int((pos.y() - rect.y()) * image.height() / rect.height())))
+        if center != self._loupe_center:
+            half = self.LOUPE_SOURCE_PIXELS // 2
+            self._loupe_source = QImage(self.LOUPE_SOURCE_PIXELS, self.LOUPE_SOURCE_PIXELS, QImage.Format_RGB32)
+            self._loupe_source.fill(Qt.black)  # Ekranın dışına taşan pikseller siyah kalır
+            if center is not None:
+                source_rect = QRect(center[1].x() - half, center[1].y() - half,
+                                    self.LOUPE_SOURCE_PIXELS, self.LOUPE_SOURCE_PIXELS)
+                inside = source_rect.intersected(image.rect())
+                painter = QPainter(self._loupe_source)
+                # Hedef ve kaynak dikdörtgenleri aynı boyutta: devicePixelRatio'dan bağımsız, piksel piksel kopya
+                painter.drawImage(inside.translated(-source_rect.topLeft()), image, inside)
+                painter.end()
+            self._loupe_center = center
+        old_rect = self._loupe_rect
+        self._loupe_pos = QPoint(pos)
+        size = self.LOUPE_SOURCE_PIXELS * self.LOUPE_ZOOM
+        height = size + self.LOUPE_LABEL_HEIGHT
+        # İmlecin sağ altına yerleştir; pencereden taşıyorsa imlecin diğer tarafına al
+        x = pos.x() + self.LOUPE_OFFSET
+        if x + size > self.width():
+            x = pos.x() - self.LOUPE_OFFSET - size
+        y = pos.y() + self.LOUPE_OFFSET
+        if y + height > self.height():
+            y = pos.y() - self.LOUPE_OFFSET - height
+        self._loupe_rect = QRect(x, y, size, height)
+        self.update(QRegion(old_rect).united(QRegion(self._loupe_rect)))
+
+    def _draw_loupe(self, painter):
+        """Önbellekteki alanı en yakın komşu büyütmesiyle, merkez pikseli ve imleç koordinatıyla çizer."""
+        if self._loupe_source is None or self._loupe_rect.isEmpty():
+            return
+        painter.save()
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, False)
+        size = self.LOUPE_SOURCE_PIXELS * self.LOUPE_ZOOM
+        view_rect = QRect(self._loupe_rect.topLeft(), QSize(size, size))
+        painter.drawImage(view_rect, self._loupe_source)
+        half = self.LOUPE_SOURCE_PIXELS // 2
+        center_cell = QRect(view_rect.x() + half * self.LOUPE_ZOOM, view_rect.y() + half * self.LOUPE_ZOOM,
+                            self.LOUPE_ZOOM, self.LOUPE_ZOOM)
+        painter.setPen(QPen(QColor(255, 0, 0, 255), 1))
+        painter.drawRect(center_cell.adjusted(0, 0, -1, -1))
+        label_rect = QRect(self._loupe_rect.left(), view_rect.bottom() + 1, size, self.LOUPE_LABEL_HEIGHT)
+        painter.fillRect(label_rect, QColor(0, 0, 0, 200))
+        global_pos = self._loupe_pos + self.geometry().topLeft()
+        painter.setPen(Qt.white)
+        painter.drawText(label_rect, Qt.AlignCenter, f"{global_pos.x()}, {global_pos.y()}")
+        painter.drawRect(self._loupe_rect.adjusted(0, 0, -1, -1))
+        painter.restore()
 
     def mousePressEvent(self, event):
         """Records the starting point of the selection."""
         try:
             if event.button() == Qt.LeftButton:
-                self.begin = event.pos()
-                self.end = event.pos()
-                self.update()  # Trigger repaint to show initial selection rectangle
+                self._set_selection(event.pos(), event.pos())
         except Exception as e:
             log_error(f"RegionSelector mousePressEvent hatası: {e}", sys.exc_info())
 
@@ -656,8 +1195,9 @@ class RegionSelector(QWidget):
         """Updates the end point of the selection as the mouse moves."""
         try:
             if event.buttons() & Qt.LeftButton:  # Only if left button is held down
-                self.end = event.pos()
-                self.update()  # Trigger repaint to update the rectangle
+                self._set_selection(self.begin, event.pos())
+            if self.loupe_enabled:
+                self._move_loupe(event.pos())
         except Exception as e:
             log_error(f"RegionSelector mouseMoveEvent hatası: {e}", sys.exc_info())
 
@@ -668,45 +1208,98 @@ class RegionSelector(QWidget):
         """
         try:
             if event.button() == Qt.LeftButton:
-                self.close()  # Close the selector window
-
                 x1 = min(self.begin.x(), self.end.x())
                 y1 = min(self.begin.y(), self.end.y())
                 x2 = max(self.begin.x(), self.end.x())
                 y2 = max(self.begin.y(), self.end.y())
-                self.selected_rect = QRect(x1, y1, x2 - x1, y2 - y1)
+                self.selected_rect = QRect(x1, y1, x2 - x1, y2 - y1).intersected(self.rect())
 
                 if self.selected_rect.width() > 0 and self.selected_rect.height() > 0:
+                    self.close()  # Close the selector window
                     self.capture_and_open_paint()
                 else:
-                    # If no valid region selected (e.g., zero width/height), just go back to main window
-                    if self.main_window_ref:
-                        self.main_window_ref.show()  # Show the original main window
-                    self.close()  # Close RegionSelector
+                    # Geçerli bölge seçilmedi (ör. sıfır genişlik/yükseklik): seçici açık kalır ve kullanıcı
+                    # aynı dondurulmuş kare üzerinde yeniden seçebilir; Esc ile ana pencereye dönülür
+                    self._set_selection(QPoint(), QPoint())
         except Exception as e:
             log_error(f"RegionSelector mouseReleaseEvent hatası: {e}", sys.exc_info())
 
+    def keyPressEvent(self, event):
+        """Esc: seçimi iptal eder ve ana pencereye döner."""
+        try:
+            if event.key() == Qt.Key_Escape:
+                self.close()
+                self._release_frame()
+                if self.main_window_ref:
+                    self.main_window_ref.show()  # Show the original main window
+            else:
+                super().keyPressEvent(event)
+        except Exception as e:
+            log_error(f"RegionSelector keyPressEvent hatası: {e}", sys.exc_info())
+
+    def _release_frame(self):
+        """Dondurulmuş kareyi bırakır; seçici kapandıktan sonra tam ekran görüntüyü bellekte tutmasın."""
+        self.frame_layout = None
+        self._frame_parts = []
+        self._uncovered = QRegion()
+        self._loupe_source = None
+
     def paintEvent(self, event):
-        """Draws the transparent gray overlay and the red selection rectangle."""
+        """
+        Draws the dimmed frozen frame with the selection cut out, the red selection rectangle and the loupe.
+        Yalnızca değişen alan (event.rect()) kopyalanır; kaynak dikdörtgenler karenin fiziksel piksellerindedir.
+        """
         try:
             painter = QPainter(self)
-            painter.setPen(QPen(QColor(255, 0, 0, 255), 2, Qt.DashLine))  # red frame added Qt.red > is old
-            painter.drawRect(QRect(self.begin, self.end))
+            dirty = event.rect()
+            selection = self._selection_rect()
+            for rect in self._uncovered.intersected(QRegion(dirty)).rects():
+                painter.fillRect(rect, Qt.black)
+            for rect, image, dimmed in self._frame_parts:
+                area = rect.intersected(dirty)
+                if area.isEmpty():
+                    continue
+                # Kaynak dikdörtgenler ekranın yakalamasının fiziksel piksellerinde
+                scale_x = image.width() / rect.width()
+                scale_y = image.height() / rect.height()
+                painter.drawPixmap(QRectF(area), dimmed,
+                                   QRectF((area.x() - rect.x()) * scale_x, (area.y() - rect.y()) * scale_y,
+                                          area.width() * scale_x, area.height() * scale_y))
+                cut = selection.intersected(area)
+                if not cut.isEmpty():
+                    painter.drawImage(QRectF(cut), image,
+                                      QRectF((cut.x() - rect.x()) * scale_x, (cut.y() - rect.y()) * scale_y,
+                                             cut.width() * scale_x, cut.height() * scale_y))
+            if not selection.isEmpty():
+                painter.setPen(QPen(QColor(255, 0, 0, 255), self.SELECTION_PEN_WIDTH, Qt.DashLine))  # red frame added Qt.red > is old
+                painter.drawRect(selection)
+            if self.loupe_enabled and self._loupe_rect.intersects(dirty):
+                self._draw_loupe(painter)
+            painter.end()
         except Exception as e:
             log_error(f"RegionSelector paintEvent hatası: {e}", sys.exc_info())
 
     def capture_and_open_paint(self):
-        """Captures the selected region and opens the paint window."""
+        """Crops the selected region from the frozen frame and opens the paint window."""
         try:
-            screen = QApplication.primaryScreen()
-            # Grab only the selected portion of the screen
-            pixmap = screen.grabWindow(0, self.selected_rect.x(), self.selected_rect.y(),
-                                       self.selected_rect.width(), self.selected_rect.height())
-
-            # Open PaintCanvasWindow with the selected region screenshot
-            paint_window = PaintCanvasWindow(pixmap, self.brush_color, self.brush_size,
-                                             self.main_window_ref)  # Pass main window reference
+            # Seçim, seçicinin sanal masaüstündeki konumuna göre global koordinatlara çevrilir ve yalnızca seçimin
+            # kesiştiği ekranların en yüksek piksel yoğunluğunda dondurulmuş kareden birleştirilir (yeni yakalama yapılmaz)
+            global_rect = self.selected_rect.translated(self.geometry().topLeft())
+            screens = [screen for screen in QApplication.screens() if screen.geometry().intersects(global_rect)]
+            if not screens:
+                screens = [QApplication.primaryScreen()]
+            layout = self.frame_layout
+            ratio = layout.device_pixel_ratio(global_rect)
+            pixmap = _pixmap_with_ratio(layout.compose(False, global_rect), ratio)
+            self._release_frame()
+
+            # Open PaintCanvasWindow with the selected region screenshot (seçimin bulunduğu ekranlarda)
+            paint_window = PaintSessionPool.acquire(self.main_window_ref,  # Pass main window reference
+                                                    pixmap, self.brush_color, self.brush_size,
+                                                    _virtual_rect(screens))
             paint_window.show()
+            if not layout.is_exact(global_rect):
+                paint_window.refine_background(BackgroundImageTask(layout.compose, True, global_rect), ratio)
         except Exception as e:
             error_msg = f"Bölge yakalama veya çizim penceresi açılamadı: {e}"
             # Always print errors
@@ -718,59 +1311,1259 @@ class RegionSelector(QWidget):
                 self.main_window_ref.show()  # Show the original main window
 
 
+def _pack_tile_image(image):
+    """QImage'ın ham ARGB32 baytlarını zlib ile sıkıştırılmış bir demete dönüştürür."""
+    raw = image.constBits().asstring(image.byteCount())
+    return image.width(), image.height(), image.bytesPerLine(), image.format(), zlib.compress(raw, 1)
+
+
+def _unpack_tile_image(packed):
+    """_pack_tile_image() çıktısından bağımsız bir QImage oluşturur."""
+    width, height, bytes_per_line, image_format, data = packed
+    raw = zlib.decompress(data)
+    # copy(): QImage'ın Python bayt nesnesine bağlı kalmaması için
+    return QImage(raw, width, height, bytes_per_line, image_format).copy()
+
+
+_RESET_HEADER = struct.Struct("<IIii")  # tuval genişliği, yüksekliği, içerik x, y
+
+
+def _pack_reset_payload(image, content_rect):
+    """
+    Başlangıç görüntüsünü günlük için paketler: tam ekran yerine yalnızca içerik dikdörtgeni ve konumu
+    yazılır. İçerik yoksa görüntü verisi hiç yazılmaz.
+    """
+    header = _RESET_HEADER.pack(image.width(), image.height(), content_rect.x(), content_rect.y())
+    if content_rect.isEmpty():
+        return header
+    return header + _pack_image_bytes(image.copy(content_rect))
+
+
+def _unpack_reset_payload(payload):
+    """_pack_reset_payload() çıktısından tam tuval boyutunda görüntüyü yeniden oluşturur."""
+    width, height, x, y = _RESET_HEADER.unpack_from(payload)
+    image = QImage(width, height, QImage.Format_ARGB32)
+    image.fill(Qt.transparent)
+    if len(payload) > _RESET_HEADER.size:
+        content, _ = _unpack_image_bytes(payload, _RESET_HEADER.size)
+        painter = QPainter(image)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        painter.drawImage(x, y, content)
+        painter.end()
+    return image
+
+
+class HistoryByteCounter:
+    """
+    Undo geçmişinin (komutlar + kontrol noktaları) toplam yaklaşık bayt miktarı. Her değişiklikte artımlı
+    güncellenir; böylece bütçe denetimi ve HUD, kontrol noktalarını tek tek dolaşmadan O(1) okur.
+    Sıkıştırma işçisi de güncellediği için kilitle korunur.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._total = 0
+
+    def add(self, delta):
+        with self._lock:
+            self._total += delta
+
+    def total(self):
+        return self._total
+
+
+class RasterCheckpoint:
+    """
+    Komut geçmişindeki bir noktada tuvalin tam raster görüntüsü.
+    Undo, en yakın kontrol noktasını geri yükleyip sonraki komutları yeniden oynatır.
+    Soğuk kontrol noktaları arka plan iş parçacığında sıkıştırılabilir, kullanılırken açılır.
+    Boyutu verilen HistoryByteCounter'a yansıtılır; geçmişten çıkarılınca release() çağrılmalıdır.
+    """
+
+    def __init__(self, image, counter=None):
+        self._image = image
+        self._packed = None
+        self._queued = False  # Sıkıştırma kuyruğunda bekliyor mu? (aynı nokta kuyruğa tekrar eklenmesin)
+        self._size = image.byteCount()
+        self._counter = counter
+        self._lock = threading.Lock()  # Sıkıştırma iş parçacığı ile GUI iş parçacığı arasında; kısa süre tutulur
+        if counter is not None:
+            counter.add(self._size)
+
+    def _set_size(self, size):
+        """Boyutu günceller ve farkı sayaca yansıtır. Kilit tutulurken çağrılır."""
+        if self._counter is not None:
+            self._counter.add(size - self._size)
+        self._size = size
+
+    def is_compressed(self):
+        """Görüntü şu anda sıkıştırılmış halde mi?"""
+        return self._packed is not None
+
+    def byte_size(self):
+        """Kontrol noktasının bellekte kapladığı yaklaşık bayt miktarı."""
+        return self._size
+
+    def claim_for_compression(self):
+        """Sıkıştırılmamış ve kuyrukta değilse kuyruğa alındı olarak işaretler ve True döndürür."""
+        with self._lock:
+            if self._packed is not None or self._queued:
+                return False
+            self._queued = True
+            return True
+
+    def release(self):
+        """Kontrol noktası geçmişten çıkarıldı: boyutu sayaçtan düşülür, sonraki değişiklikler yansıtılmaz."""
+        with self._lock:
+            if self._counter is not None:
+                self._counter.add(-self._size)
+                self._counter = None
+
+    def compress(self):
+        """
+        Görüntüyü zlib ile sıkıştırır. Arka plan iş parçacığından çağrılır. Sıkıştırma kilit dışında yapılır;
+        GUI iş parçacığı bu sırada görüntüyü kullanabilir. Sonuç, görüntü değişmediyse kilit altında yerleştirilir.
+        """
+        with self._lock:
+            self._queued = False
+            if self._packed is not None:
+                return
+            image = self._image
+        packed = _pack_tile_image(image)
+        with self._lock:
+            if self._packed is None and self._image is image:
+                self._packed = packed
+                self._image = None
+                self._set_size(len(packed[-1]))
+
+    def image(self):
+        """Kontrol noktası görüntüsünü döndürür, gerekirse önce açar."""
+        with self._lock:
+            if self._packed is not None:
+                self._image = _unpack_tile_image(self._packed)
+                self._packed = None
+                self._set_size(self._image.byteCount())
+            return self._image
+
+
+def _pack_image_bytes(image):
+    """QImage'ı oturum günlüğü için bayt dizisine dönüştürür (boyut/format başlığı + zlib verisi)."""
+    width, height, bytes_per_line, image_format, data = _pack_tile_image(image)
+    return struct.pack("<IIIiI", width, height, bytes_per_line, int(image_format), len(data)) + data
+
+
+def _unpack_image_bytes(payload, offset=0):
+    """_pack_image_bytes() çıktısını okur; (QImage, sonraki ofset) döndürür."""
+    width, height, bytes_per_line, image_format, length = struct.unpack_from("<IIIiI", payload, offset)
+    offset += struct.calcsize("<IIIiI")
+    packed = (width, height, bytes_per_line, QImage.Format(image_format), payload[offset:offset + length])
+    return _unpack_tile_image(packed), offset + length
+
+
+class DrawCommand:
+    """
+    Çizim belgesindeki tek bir komut: kalem/vurgulayıcı/silgi darbesi ("stroke"),
+    şekil ("shape") veya tuvali temizleme ("clear"). Dışarıdan yüklenen görüntü komut değildir; geçmişi
+    sıfırlar ve yeni başlangıç durumu olur (bkz. PaintCanvasWindow.set_overlay_image).
+    Tuval, komutlar sırayla yeniden oynatılarak birebir yeniden oluşturulabilir.
+    """
+    KINDS = ("stroke", "shape", "clear")
+    TOOLS = (None, "pen", "highlight", "eraser", "line", "rect", "ellipse")
+    _HEADER = struct.Struct("<BBIfBI")  # kind, tool, rgba, width, line_style, nokta sayısı (noktalar <ff)
+
+    MIN_PRESSURE_SCALE = 0.1  # Çok hafif basınçta bile darbe görünür kalsın
+    PRESSURE_LEVELS = 65535  # Basınç 16 bit olarak saklanır; günlükten kurtarılan darbe birebir aynı çizilir
+    SUBPIXEL_STEPS = 64  # Noktalar 1/64 piksele yuvarlanır (Qt'nin tarayıcı hassasiyeti); float32'de tam temsil edilir
+
+    def __init__(self, kind, tool=None, color=None, width=0, line_style=Qt.SolidLine, points=None, breaks=None,
+                 pressures=None, tilts=None):
+        self.kind = kind
+        self.tool = tool
+        self.color = QColor(color) if color is not None else QColor(Qt.transparent)
+        self.width = width
+        self.line_style = line_style
+        self.points = points if points is not None else []  # QPointF, 1/64 piksel çözünürlükte
+        # Darbelerde, her karede tek bir çoklu çizgi (polyline) olarak çizilen parçaların son nokta indeksleri
+        self.breaks = breaks if breaks is not None else []
+        # Kalem tableti darbelerinde nokta başına basınç (0-1) ve eğim (x, y derece); fare darbelerinde boş
+        self.pressures = pressures if pressures is not None else []
+        self.tilts = tilts if tilts is not None else []
+        self.generation = 0  # Komut geçmişine eklenirken PaintCanvasWindow tarafından atanır (kaydedilmez)
+        self.extent = None  # Komuttan sonraki içerik kapsamı; PaintCanvasWindow tarafından atanır (kaydedilmez)
+
+    def composition_mode(self):
+        """Komutun tuvale uygulanacağı birleştirme modu."""
+        if self.tool == "eraser":
+            return QPainter.CompositionMode_Clear
+        return QPainter.CompositionMode_SourceOver
+
+    def uses_scratch_layer(self):
+        """
+        Yarı saydam darbeler (vurgulayıcı, alfası 255'ten küçük kalem) önce opak olarak ayrı bir karalama
+        görüntüsüne çizilir ve tuvale tek seferde, rengin alfasıyla birleştirilir. Böylece darbenin kendi
+        üzerine binen uçları ve parçaları koyulaşmaz, darbe her yerde aynı saydamlıkta görünür.
+        """
+        return self.kind == "stroke" and self.tool != "eraser" and self.color.alpha() < 255
+
+    def stroke_opacity(self):
+        """Karalama görüntüsünün tuvale birleştirilirken kullanılan saydamlığı (0-1)."""
+        return self.color.alphaF() if self.uses_scratch_layer() else 1.0
+
+    def make_pen(self):
+        """Canlı çizimde ve yeniden oynatmada aynı kalemin kullanılmasını sağlar."""
+        if self.tool == "eraser":
+            return QPen(Qt.transparent, self.width, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin)
+        style = Qt.SolidLine if self.tool == "highlight" else self.line_style
+        color = QColor(self.color)
+        if self.uses_scratch_layer():
+            color.setAlpha(255)  # Saydamlık birleştirme sırasında stroke_opacity() ile uygulanır
+        return QPen(color, self.width, style, Qt.RoundCap, Qt.RoundJoin)
+
+    def begin_painter(self, image):
+        """Bu komutun ayarlarıyla hazırlanmış bir QPainter döndürür."""
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing, True)
+        painter.setCompositionMode(self.composition_mode())
+        painter.setPen(self.make_pen())
+        return painter
+
+    @classmethod
+    def quantize_pressure(cls, pressure):
+        """Basıncı günlükte saklanan 16 bit çözünürlüğe yuvarlar."""
+        return round(min(1.0, max(0.0, pressure)) * cls.PRESSURE_LEVELS) / cls.PRESSURE_LEVELS
+
+    @classmethod
+    def quantize_point(cls, point):
+        """Noktayı günlükte saklanan alt piksel çözünürlüğe yuvarlar."""
+        return QPointF(round(point.x() * cls.SUBPIXEL_STEPS) / cls.SUBPIXEL_STEPS,
+                       round(point.y() * cls.SUBPIXEL_STEPS) / cls.SUBPIXEL_STEPS)
+
+    def composite_scratch(self, image, scratch, origin):
+        """Karalama görüntüsünü (sol üst köşesi origin'de) darbenin saydamlığıyla görüntünün üzerine birleştirir."""
+        painter = QPainter(image)
+        painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+        painter.setOpacity(self.stroke_opacity())
+        painter.drawImage(origin, scratch)
+        painter.end()
+
+    def draw_pressure_segments(self, painter, start, end):
+        """
+        Basınçlı darbenin start..end noktaları arasındaki parçalarını, her parçanın kalınlığı uçlarındaki
+        basınçların ortalamasıyla ölçeklenerek çizer. Canlı çizim ve yeniden oynatma aynı yolu kullanır.
+        """
+        pen = painter.pen()
+        for i in range(start + 1, end + 1):
+            pressure = (self.pressures[i - 1] + self.pressures[i]) / 2
+            pen.setWidthF(self.width * max(self.MIN_PRESSURE_SCALE, pressure))
+            painter.setPen(pen)
+            painter.drawLine(QLineF(self.points[i - 1], self.points[i]))
+
+    def resets_canvas(self):
+        """Komut tuvali önceki durumdan bağımsız hale getiriyorsa True (temizleme)."""
+        return self.kind == "clear"
+
+    def bounds(self, canvas_rect):
+        """Komutun etkilediği alan."""
+        if self.resets_canvas() or not self.points:
+            return QRect(canvas_rect)
+        margin = int(self.width / 2) + 2  # Yuvarlak uçlar ve antialiasing payı
+        xs = [point.x() for point in self.points]
+        ys = [point.y() for point in self.points]
+        rect = QRectF(QPointF(min(xs), min(ys)), QPointF(max(xs), max(ys))).toAlignedRect()
+        return rect.adjusted(-margin, -margin, margin, margin)
+
+    def byte_size(self):
+        """Geçmiş bellek bütçesi için yaklaşık boyut."""
+        return 64 + 16 * len(self.points) + 24 * len(self.pressures)
+
+    def to_bytes(self):
+        """Komutu oturum günlüğü için kompakt ikili biçime dönüştürür."""
+        header = self._HEADER.pack(self.KINDS.index(self.kind), self.TOOLS.index(self.tool), self.color.rgba(),
+                                   float(self.width), int(self.line_style), len(self.points))
+        coords = []
+        for point in self.points:
+            coords.extend((point.x(), point.y()))
+        payload = header + struct.pack(f"<{len(coords)}f", *coords)
+        payload += struct.pack(f"<I{len(self.breaks)}I", len(self.breaks), *self.breaks)
+        tilt_values = [value for tilt in self.tilts for value in tilt]
+        levels = [round(pressure * self.PRESSURE_LEVELS) for pressure in self.pressures]
+        payload += struct.pack(f"<I{len(levels)}H{len(tilt_values)}b", len(levels), *levels, *tilt_values)
+        return payload
+
+    @classmethod
+    def from_bytes(cls, payload):
+        """to_bytes() çıktısından komutu yeniden oluşturur."""
+        kind, tool, rgba, width, line_style, point_count = cls._HEADER.unpack_from(payload, 0)
+        offset = cls._HEADER.size
+        coords = struct.unpack_from(f"<{point_count * 2}f", payload, offset)
+        offset += point_count * 8
+        points = [QPointF(coords[i], coords[i + 1]) for i in range(0, len(coords), 2)]
+        break_count, = struct.unpack_from("<I", payload, offset)
+        breaks = list(struct.unpack_from(f"<{break_count}I", payload, offset + 4))
+        offset += 4 + break_count * 4
+        sample_count, = struct.unpack_from("<I", payload, offset)
+        offset += 4
+        pressures = [level / cls.PRESSURE_LEVELS
+                     for level in struct.unpack_from(f"<{sample_count}H", payload, offset)]
+        offset += sample_count * 2
+        tilt_values = struct.unpack_from(f"<{sample_count * 2}b", payload, offset)
+        offset += sample_count * 2
+        tilts = [(tilt_values[i], tilt_values[i + 1]) for i in range(0, len(tilt_values), 2)]
+        return cls(cls.KINDS[kind], cls.TOOLS[tool], QColor.fromRgba(rgba), width, Qt.PenStyle(line_style),
+                   points, breaks, pressures, tilts)
+
+    def _draw_stroke(self, painter):
+        """Darbenin tüm noktalarını canlı çizimdeki parçalamayla çizer."""
+        if self.pressures:
+            self.draw_pressure_segments(painter, 0, len(self.points) - 1)
+            return
+        # Canlı çizimle aynı sonucu vermek için her kare parçası ayrı bir çoklu çizgi olarak çizilir
+        start = 0
+        for end in self.breaks or [len(self.points) - 1]:
+            painter.drawPolyline(QPolygonF(self.points[start:end + 1]))
+            start = end
+
+    def render(self, image):
+        """Komutu verilen görüntünün üzerine çizer."""
+        if self.kind == "clear":
+            image.fill(Qt.transparent)
+            return
+
+        if self.uses_scratch_layer():
+            # Canlı çizimdeki gibi: darbe kapsamı kadar bir karalama görüntüsüne opak çiz, sonra birleştir
+            scratch_rect = self.bounds(image.rect()).intersected(image.rect())
+            if scratch_rect.isEmpty():
+                return
+            scratch = QImage(scratch_rect.size(), QImage.Format_ARGB32_Premultiplied)
+            scratch.fill(Qt.transparent)
+            painter = self.begin_painter(scratch)
+            painter.translate(-scratch_rect.topLeft())
+            self._draw_stroke(painter)
+            painter.end()
+            self.composite_scratch(image, scratch, scratch_rect.topLeft())
+            return
+
+        painter = self.begin_painter(image)
+        if self.kind == "stroke":
+            self._draw_stroke(painter)
+        elif self.kind == "shape" and len(self.points) == 2:
+            start, end = self.points
+            if self.tool == "line":
+                painter.drawLine(QLineF(start, end))
+            elif self.tool == "rect":
+                painter.drawRect(QRectF(start, end).normalized())
+            elif self.tool == "ellipse":
+                painter.drawEllipse(QRectF(start, end).normalized())
+        painter.end()
+
+
+class OneEuroFilter:
+    """
+    One-Euro filtresi: yavaş harekette titremeyi güçlü biçimde süzer, hız arttıkça kesim frekansını
+    yükselterek gecikmeyi azaltır. Koordinatlar kayan noktalı tutulur, her örnekte yuvarlama yapılmaz.
+    """
+
+    def __init__(self, min_cutoff, beta=0.02, derivative_cutoff=1.0):
+        self.min_cutoff = min_cutoff  # Hz; düşük değer daha güçlü yumuşatma
+        self.beta = beta  # Hıza bağlı kesim artışı; yüksek değer hızlı harekette daha az gecikme
+        self.derivative_cutoff = derivative_cutoff
+        self._last = None
+        self._last_raw = None
+        self._last_derivative = (0.0, 0.0)
+        self._last_timestamp = 0
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def reset(self, point, timestamp):
+        self._last = (point.x(), point.y())
+        self._last_raw = QPointF(point)
+        self._last_derivative = (0.0, 0.0)
+        self._last_timestamp = timestamp
+
+    def push(self, point, timestamp):
+        dt = max(timestamp - self._last_timestamp, 1) / 1000.0  # Aynı milisaniyedeki örnekler için alt sınır
+        self._last_timestamp = timestamp
+        self._last_raw = QPointF(point)
+        derivative_alpha = self._alpha(self.derivative_cutoff, dt)
+        dx = derivative_alpha * (point.x() - self._last[0]) / dt + (1 - derivative_alpha) * self._last_derivative[0]
+        dy = derivative_alpha * (point.y() - self._last[1]) / dt + (1 - derivative_alpha) * self._last_derivative[1]
+        self._last_derivative = (dx, dy)
+
+        alpha = self._alpha(self.min_cutoff + self.beta * math.hypot(dx, dy), dt)
+        self._last = (alpha * point.x() + (1 - alpha) * self._last[0],
+                      alpha * point.y() + (1 - alpha) * self._last[1])
+        return [QPointF(*self._last)]
+
+    def finish(self):
+        # Darbe, kalemin kaldırıldığı gerçek noktada biter; filtre gecikmesi sonda kapatılır
+        if self._last_raw is None or QPointF(*self._last) == self._last_raw:
+            return []
+        return [QPointF(self._last_raw)]
+
+
+class CatmullRomInterpolator:
+    """
+    Gelen noktalar arasına Catmull-Rom eğrisi üzerinde ara noktalar ekler, böylece seyrek örneklerde
+    köşeli çizgiler yerine yumuşak bir eğri çizilir. Bir parçanın eğrisi sonraki noktaya bağlı olduğundan
+    çıktı bir örnek geriden gelir; finish() son parçayı tamamlar.
+    """
+    SEGMENT_LENGTH = 4.0  # Ara noktalar arasındaki yaklaşık uzaklık (piksel)
+    MAX_SUBDIVISIONS = 16
+
+    def __init__(self):
+        self._window = []
+
+    def reset(self, point, timestamp):
+        self._window = [QPointF(point)]
+
+    def _segment(self, p0, p1, p2, p3):
+        """p1'den p2'ye (p2 dahil) eğri üzerindeki noktalar."""
+        steps = min(self.MAX_SUBDIVISIONS, max(1, math.ceil(QLineF(p1, p2).length() / self.SEGMENT_LENGTH)))
+        points = []
+        for step in range(1, steps + 1):
+            t = step / steps
+            t2, t3 = t * t, t * t * t
+            points.append(0.5 * ((2 * p1) + (p2 - p0) * t + (2 * p0 - 5 * p1 + 4 * p2 - p3) * t2 +
+                                 (3 * p1 - p0 - 3 * p2 + p3) * t3))
+        return points
+
+    def push(self, point, timestamp):
+        self._window = (self._window + [QPointF(point)])[-4:]
+        if len(self._window) < 3:
+            return []
+        p1, p2, p3 = self._window[-3:]
+        p0 = self._window[-4] if len(self._window) == 4 else p1
+        return self._segment(p0, p1, p2, p3)
+
+    def finish(self):
+        if len(self._window) < 2:
+            return []
+        p1, p2 = self._window[-2:]
+        p0 = self._window[-3] if len(self._window) >= 3 else p1
+        return self._segment(p0, p1, p2, p2)
+
+
+class StrokeFilterChain:
+    """
+    Darbe noktalarını sırayla bir dizi filtreden geçirir. Her filtre reset(point, timestamp),
+    push(point, timestamp) -> [QPointF] ve finish() -> [QPointF] sağlar; yeni filtreler STROKE_FILTERS'a eklenir.
+    """
+    STROKE_FILTERS = {
+        "one_euro": lambda smoothing_factor: OneEuroFilter(min_cutoff=10.0 / (1 + smoothing_factor)),
+        "catmull_rom": lambda smoothing_factor: CatmullRomInterpolator(),
+    }
+
+    def __init__(self, filters):
+        self.filters = filters
+        self._timestamp = 0
+
+    @classmethod
+    def from_config(cls, names, smoothing_factor):
+        """app_config.json'daki 'stroke_filters' adlarından zinciri kurar; bilinmeyen adlar atlanır."""
+        filters = []
+        for name in names:
+            if name in cls.STROKE_FILTERS:
+                filters.append(cls.STROKE_FILTERS[name](smoothing_factor))
+            else:
+                log_error(f"Bilinmeyen darbe filtresi app_config.json'da: {name}")
+        return cls(filters)
+
+    def reset(self, point, timestamp):
+        self._timestamp = timestamp
+        for stroke_filter in self.filters:
+            stroke_filter.reset(point, timestamp)
+
+    def push(self, point, timestamp):
+        self._timestamp = timestamp
+        points = [QPointF(point)]
+        for stroke_filter in self.filters:
+            points = [output for p in points for output in stroke_filter.push(p, timestamp)]
+        return points
+
+    def finish(self):
+        points = []
+        for stroke_filter in self.filters:
+            points = [output for p in points for output in stroke_filter.push(p, self._timestamp)]
+            points += stroke_filter.finish()
+        return points
+
+
+class StrokePredictor:
+    """
+    Giriş hızından kısa vadeli konum tahmini. Tahmin edilen uç yalnızca ekranda gösterilir, darbeye
+    kaydedilmez; bir sonraki karede gerçek noktalarla değiştirilir ve algılanan gecikmeyi azaltır.
+    """
+
+    def __init__(self, horizon_ms):
+        self.horizon_ms = horizon_ms
+        self._last = None
+        self._last_timestamp = 0
+        self._velocity = QPointF()  # piksel / ms
+
+    def reset(self, point, timestamp):
+        self._last = QPointF(point)
+        self._last_timestamp = timestamp
+        self._velocity = QPointF()
+
+    def update(self, point, timestamp):
+        dt = max(timestamp - self._last_timestamp, 1)
+        velocity = (QPointF(point) - self._last) / dt
+        self._velocity = 0.5 * velocity + 0.5 * self._velocity  # Tek örnekteki sıçramaları yumuşat
+        self._last = QPointF(point)
+        self._last_timestamp = timestamp
+
+    def predict(self, from_point):
+        """from_point'ten tahmin ufku kadar ilerideki nokta."""
+        return from_point + self._velocity * self.horizon_ms
+
+
+class UndoCompressor:
+    """
+    Soğuk undo kontrol noktalarını GUI iş parçacığını bloklamadan sıkıştıran arka plan işçisi.
+    zlib sıkıştırma sırasında GIL'i bıraktığı için çizim akıcı kalır.
+    """
+    _queue = queue.Queue()
+    _thread = None
+
+    @classmethod
+    def enqueue(cls, checkpoint):
+        """Bir RasterCheckpoint'i sıkıştırma kuyruğuna ekler; işçi gerekirse başlatılır."""
+        if cls._thread is None or not cls._thread.is_alive():
+            cls._thread = threading.Thread(target=cls._run, name="UndoCompressor", daemon=True)
+            cls._thread.start()
+        cls._queue.put(checkpoint)
+
+    @classmethod
+    def _run(cls):
+        while True:
+            checkpoint = cls._queue.get()
+            try:
+                checkpoint.compress()
+            except Exception as e:
+                log_error(f"Undo kontrol noktası sıkıştırılırken hata: {e}", sys.exc_info())
+
+
+_ZERO_RUN_PATTERN = re.compile(rb"\x00{32,}")  # En az ~8 tamamen şeffaf piksel (tek karakter tekrarı hızlıdır)
+_RLE_RUN_HEADER = struct.Struct("<II")  # düz (literal) piksel sayısı, ardından gelen şeffaf piksel sayısı
+
+
+def _rle_encode_argb32(raw):
+    """
+    Ham ARGB32 baytlarını sıfır-koşu (zero-run) RLE ile kodlar. Çizim katmanı çoğunlukla tamamen
+    şeffaf piksellerden oluştuğu için bu, sıkıştırma kütüphanesi olmadan bile çok küçük çıktı verir.
+    Çıktı: [<II> düz piksel sayısı, şeffaf piksel sayısı][düz piksel baytları] blokları.
+    """
+    chunks = []
+    literal_start = 0
+    for match in _ZERO_RUN_PATTERN.finditer(raw):
+        # Eşleşmeyi piksel (4 bayt) sınırlarına hizala
+        start = (match.start() + 3) & ~3
+        end = match.end() & ~3
+        if end - start < 16:
+            continue
+        chunks.append(_RLE_RUN_HEADER.pack((start - literal_start) // 4, (end - start) // 4))
+        chunks.append(raw[literal_start:start])
+        literal_start = end
+    chunks.append(_RLE_RUN_HEADER.pack((len(raw) - literal_start) // 4, 0))
+    chunks.append(raw[literal_start:])
+    return b"".join(chunks)
+
+
+def _rle_decode_argb32(data):
+    """_rle_encode_argb32() çıktısını ham ARGB32 baytlarına geri açar."""
+    out = bytearray()
+    offset = 0
+    while offset < len(data):
+        literal_pixels, zero_pixels = _RLE_RUN_HEADER.unpack_from(data, offset)
+        offset += _RLE_RUN_HEADER.size
+        out += data[offset:offset + literal_pixels * 4]
+        offset += literal_pixels * 4
+        out += bytes(zero_pixels * 4)
+    return bytes(out)
+
+
+# Otomatik kayıt karo kodekleri; app_config.json'daki 'auto_save_codec' ile seçilir
+_AUTO_SAVE_CODECS = ("zlib", "rle", "png")
+_DEFAULT_AUTO_SAVE_CODEC = "zlib"
+
+
+def _encode_tile_pixels(tile_image, codec):
+    """ARGB32 bir karoyu seçilen kodekle bayt dizisine dönüştürür."""
+    if codec == "png":
+        buffer = QBuffer()
+        buffer.open(QBuffer.WriteOnly)
+        tile_image.save(buffer, "PNG")
+        data = buffer.data().data()
+        buffer.close()
+        return data
+    raw = tile_image.constBits().asstring(tile_image.byteCount())
+    if codec == "rle":
+        return _rle_encode_argb32(raw)
+    return zlib.compress(raw, 1)  # Hız için en düşük sıkıştırma seviyesi
+
+
+def _decode_tile_pixels(data, codec, width, height):
+    """_encode_tile_pixels() çıktısından ARGB32 bir QImage oluşturur."""
+    if codec == "png":
+        return QImage.fromData(data, "PNG").convertToFormat(QImage.Format_ARGB32)
+    raw = _rle_decode_argb32(data) if codec == "rle" else zlib.decompress(data)
+    return QImage(raw, width, height, width * 4, QImage.Format_ARGB32).copy()
+
+
+class TiledAutoSaveFile:
+    """
+    Otomatik kaydın karo tabanlı, yalnızca eklemeli dosyası. Her kayıtta yalnızca son kayıttan
+    bu yana değişen karolar dosyanın sonuna eklenir; kayıt maliyeti ekran çözünürlüğüyle değil
+    değişiklik miktarıyla orantılıdır. Aynı karo için dosyadaki son kayıt geçerlidir.
+
+    Dosya biçimi: MAGIC, <IIIB (tuval genişliği, yüksekliği, karo boyu, kodek), ardından her karo için
+    <HHI (karo x, karo y, veri uzunluğu) + kodlanmış karo. Uzunluk 0 boş (şeffaf) karo demektir.
+    Kodek _AUTO_SAVE_CODECS içindeki indekstir (zlib seviye 1, sıfır-koşu RLE veya PNG).
+    Dosya canlı verinin COMPACT_RATIO katını aşınca baştan yazılır.
+    Bir örnek aynı anda yalnızca tek bir iş parçacığından kullanılmalıdır.
+    """
+    MAGIC = b"KKT2"
+    TILE_SIZE = 256
+    COMPACT_RATIO = 3
+    COMPACT_MIN_BYTES = 1024 * 1024  # Bu boyutun altındaki dosyalar baştan yazılmaz
+    _FILE_HEADER = struct.Struct("<IIIB")
+    _TILE_HEADER = struct.Struct("<HHI")
+
+    def __init__(self, path, codec=_DEFAULT_AUTO_SAVE_CODEC):
+        self.path = path
+        self.codec = codec
+        self._canvas_size = None  # Dosyanın bu oturumda yazıldığı tuval boyutu; None: henüz yazılmadı
+        self._live_sizes = {}  # (tx, ty) -> dosyadaki geçerli kaydın boyutu
+        self._file_size = 0
+
+    def _tile_rects(self, image_rect, dirty_rect):
+        """dirty_rect ile kesişen karoların (anahtar, dikdörtgen) listesi."""
+        tile = self.TILE_SIZE
+        dirty_rect = dirty_rect.intersected(image_rect)
+        if dirty_rect.isEmpty():
+            return []
+        rects = []
+        for ty in range(dirty_rect.top() // tile, dirty_rect.bottom() // tile + 1):
+            for tx in range(dirty_rect.left() // tile, dirty_rect.right() // tile + 1):
+                rects.append(((tx, ty), QRect(tx * tile, ty * tile, tile, tile).intersected(image_rect)))
+        return rects
+
+    def _encode_tile(self, image, key, rect, content_rect):
+        """Bir karoyu dosya kaydına dönüştürür; boş karolar (içerik dikdörtgeni dışındakiler dahil) veri taşımaz."""
+        if not rect.intersects(content_rect):
+            return self._TILE_HEADER.pack(key[0], key[1], 0)
+        tile_image = image.copy(rect)
+        raw = tile_image.constBits().asstring(tile_image.byteCount())
+        data = _encode_tile_pixels(tile_image, self.codec) if raw.strip(b"\0") else b""
+        return self._TILE_HEADER.pack(key[0], key[1], len(data)) + data
+
+    def save(self, image, dirty_rect, content_rect=None):
+        """
+        Değişen karoları dosyaya ekler (gerekirse dosyayı baştan yazar). Yazılan bayt sayısını döndürür.
+        content_rect, görünür içeriği kapsayan dikdörtgendir; verilmezse görüntü taranarak bulunur.
+        """
+        image = image.convertToFormat(QImage.Format_ARGB32)
+        if content_rect is None:
+            content_rect = _visible_content_rect(image)
+        if self._canvas_size != image.size():
+            # İlk kayıt veya tuval boyutu değişti: diskteki eski oturum verisinin üzerine baştan yaz
+            return self._rewrite(image, content_rect)
+
+        records = []
+        for key, rect in self._tile_rects(image.rect(), dirty_rect):
+            record = self._encode_tile(image, key, rect, content_rect)
+            records.append(record)
+            if len(record) > self._TILE_HEADER.size:
+                self._live_sizes[key] = len(record)
+            else:
+                self._live_sizes.pop(key, None)
+        if not records:
+            return 0
+
+        data = b"".join(records)
+        live_bytes = len(self.MAGIC) + self._FILE_HEADER.size + sum(self._live_sizes.values())
+        if self._file_size + len(data) > max(self.COMPACT_RATIO * live_bytes, self.COMPACT_MIN_BYTES):
+            return self._rewrite(image, content_rect)
+
+        with open(self.path, 'ab') as f:
+            f.write(data)
+        self._file_size += len(data)
+        return len(data)
+
+    def _rewrite(self, image, content_rect):
+        """Dosyayı yalnızca boş olmayan karolarla baştan yazar (geçici dosya + os.replace)."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._live_sizes = {}
+        chunks = [self.MAGIC, self._FILE_HEADER.pack(image.width(), image.height(), self.TILE_SIZE,
+                                                     _AUTO_SAVE_CODECS.index(self.codec))]
+        # Yalnızca görünür içeriğin sınır dikdörtgenine değen karolar yazılır
+        for key, rect in self._tile_rects(image.rect(), content_rect):
+            record = self._encode_tile(image, key, rect, content_rect)
+            if len(record) > self._TILE_HEADER.size:
+                chunks.append(record)
+                self._live_sizes[key] = len(record)
+        data = b"".join(chunks)
+
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, self.path)
+        self._canvas_size = image.size()
+        self._file_size = len(data)
+        return len(data)
+
+    @classmethod
+    def load(cls, path):
+        """Dosyadaki karoları birleştirip tam tuval görüntüsünü döndürür. Geçersiz dosyada None döner."""
+        with open(path, 'rb') as f:
+            data = f.read()
+        header_size = len(cls.MAGIC) + cls._FILE_HEADER.size
+        if len(data) < header_size or not data.startswith(cls.MAGIC):
+            return None
+        width, height, tile, codec_index = cls._FILE_HEADER.unpack_from(data, len(cls.MAGIC))
+        if codec_index >= len(_AUTO_SAVE_CODECS):
+            return None
+        codec = _AUTO_SAVE_CODECS[codec_index]
+
+        # Aynı karo için son kayıt geçerli
+        latest = {}
+        offset = header_size
+        while offset + cls._TILE_HEADER.size <= len(data):
+            tx, ty, length = cls._TILE_HEADER.unpack_from(data, offset)
+            start = offset + cls._TILE_HEADER.size
+            if start + length > len(data):
+                break  # Yarım yazılmış son kayıt
+            latest[(tx, ty)] = (start, length)
+            offset = start + length
+
+        image = QImage(width, height, QImage.Format_ARGB32)
+        image.fill(Qt.transparent)
+        painter = QPainter(image)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        for (tx, ty), (start, length) in latest.items():
+            if length == 0:
+                continue
+            rect = QRect(tx * tile, ty * tile, tile, tile).intersected(image.rect())
+            tile_image = _decode_tile_pixels(data[start:start + length], codec, rect.width(), rect.height())
+            painter.drawImage(rect.topLeft(), tile_image)
+        painter.end()
+        return image
+
+
+class MappedOverlayStore:
+    """
+    Çizim katmanı için bellek eşlemeli (mmap) dosya deposu. Katman QImage'ı doğrudan eşlenmiş dosyanın
+    pikselleri üzerine kurulur: otomatik kayıt yalnızca değişen sayfaların diske yazılmasıdır (flush) ve
+    önceki oturumun çizimi okuma, kod çözme ve ölçekleme olmadan dosyayı yeniden eşleyerek yüklenir.
+
+    Dosya biçimi: MAGIC, <III (genişlik, yükseklik, satır baytı), HEADER_SIZE'a tamamlanmış başlık,
+    ardından ham ARGB32 pikseller.
+    """
+    MAGIC = b"KKM1"
+    HEADER_SIZE = 16
+    _HEADER = struct.Struct("<III")
+
+    def __init__(self, path, file, mapping, width, height):
+        self.path = path
+        self._file = file
+        self._mapping = mapping
+        self._bytes_per_line = width * 4
+        # QImage ham işaretçiyle kurulur; ctypes dizisi eşlemenin kapatılmasını açıkça engeller
+        self._buffer = (ctypes.c_char * (self._bytes_per_line * height)).from_buffer(mapping, self.HEADER_SIZE)
+        self.image = QImage(sip.voidptr(ctypes.addressof(self._buffer)), width, height, self._bytes_per_line,
+                            QImage.Format_ARGB32)
+
+    @classmethod
+    def create(cls, path, size):
+        """Verilen boyutta yeni, tamamen şeffaf bir depo oluşturur (seyrek dosya, sıfırlama maliyeti yok)."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        width, height = size.width(), size.height()
+        f = open(path, 'w+b')
+        f.write(cls.MAGIC + cls._HEADER.pack(width, height, width * 4))
+        f.truncate(cls.HEADER_SIZE + width * 4 * height)
+        return cls(path, f, mmap.mmap(f.fileno(), 0), width, height)
+
+    @classmethod
+    def _read_header(cls, f):
+        """Başlığı doğrular; geçerliyse (genişlik, yükseklik), değilse None döndürür."""
+        header = f.read(cls.HEADER_SIZE)
+        if len(header) < cls.HEADER_SIZE or not header.startswith(cls.MAGIC):
+            return None
+        width, height, bytes_per_line = cls._HEADER.unpack_from(header, len(cls.MAGIC))
+        f.seek(0, os.SEEK_END)
+        if bytes_per_line != width * 4 or f.tell() != cls.HEADER_SIZE + bytes_per_line * height:
+            return None
+        return width, height
+
+    @classmethod
+    def open_existing(cls, path):
+        """Var olan bir depo dosyasını eşler. Dosya geçersizse None döner."""
+        f = open(path, 'r+b')
+        dimensions = cls._read_header(f)
+        if dimensions is None:
+            f.close()
+            return None
+        return cls(path, f, mmap.mmap(f.fileno(), 0), *dimensions)
+
+    @classmethod
+    def read_image(cls, path):
+        """Depo dosyasının piksellerini bağımsız bir QImage olarak okur (boyutu farklı tuvaller için)."""
+        with open(path, 'rb') as f:
+            dimensions = cls._read_header(f)
+            if dimensions is None:
+                return None
+            width, height = dimensions
+            f.seek(cls.HEADER_SIZE)
+            raw = f.read(width * 4 * height)
+        return QImage(raw, width, height, width * 4, QImage.Format_ARGB32).copy()
+
+    def size(self):
+        return self.image.size()
+
+    def flush(self, rect):
+        """rect'in kapsadığı satırların sayfalarını diske yazar. Yazılan bayt aralığının boyutunu döndürür."""
+        rect = rect.intersected(self.image.rect())
+        if rect.isEmpty():
+            return 0
+        start = self.HEADER_SIZE + rect.top() * self._bytes_per_line
+        end = self.HEADER_SIZE + (rect.bottom() + 1) * self._bytes_per_line
+        start -= start % mmap.ALLOCATIONGRANULARITY  # flush başlangıcı sayfa hizalı olmalı
+        self._mapping.flush(start, end - start)
+        return end - start
+
+    def close(self, delete=False):
+        """Eşlemeyi diske yazar ve kapatır. Çağırmadan önce self.image'a başka referans kalmamalıdır."""
+        self.image = None
+        self._buffer = None
+        self._mapping.flush()
+        self._mapping.close()
+        self._file.close()
+        if delete and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class AutoSaveSignals(QObject):
+    """AutoSaveTask'ın GUI iş parçacığına sonuç bildirdiği sinyaller."""
+    finished = pyqtSignal(bool, str, float)  # başarılı mı, bilgi/hata mesajı, süre (ms)
+
+
+class AutoSaveTask(QRunnable):
+    """
+    Otomatik kaydı QThreadPool üzerinde yapan iş. Değişmeyen bir anlık görüntü ve son kayıttan
+    bu yana değişen alanı alır, böylece kodlama ve dosya yazma sırasında GUI iş parçacığı çizmeye devam edebilir.
+    """
+
+    def __init__(self, image, dirty_rect, save_file, content_rect):
+        super().__init__()
+        self.image = image
+        self.dirty_rect = dirty_rect
+        self.save_file = save_file
+        self.content_rect = content_rect
+        self.signals = AutoSaveSignals()
+
+    def run(self):
+        started = time.perf_counter()
+        try:
+            byte_count = self.save_file.save(self.image, self.dirty_rect, self.content_rect)
+            _debug_print(f"Saved overlay_image contains visible content: {not self.content_rect.isEmpty()}")
+            self.signals.finished.emit(
+                True, f"Resim Boyutu: {self.image.width()}x{self.image.height()}, Yazılan: {byte_count} bytes",
+                (time.perf_counter() - started) * 1000)
+        except Exception as e:
+            log_error(f"Otomatik çizim kaydedilirken hata: {e}", sys.exc_info())
+            self.signals.finished.emit(False, str(e), (time.perf_counter() - started) * 1000)
+
+
+def _recovery_journal_files():
+    """Çökmüş oturumlardan kalan kurtarma günlükleri, en yenisi önce."""
+    directory = os.path.dirname(_SESSION_JOURNAL_RECOVERY_FILE)
+    if not os.path.isdir(directory):
+        return []
+    paths = [os.path.join(directory, name) for name in os.listdir(directory)
+             if _SESSION_JOURNAL_RECOVERY_PATTERN.match(name)]
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+def _next_recovery_journal_path():
+    """Var olan bir kurtarma günlüğünü ezmeyen ilk dosya yolu."""
+    path = _SESSION_JOURNAL_RECOVERY_FILE
+    index = 0
+    while os.path.exists(path):
+        index += 1
+        path = os.path.join(os.path.dirname(_SESSION_JOURNAL_RECOVERY_FILE), f"session_journal.recover.{index}.bin")
+    return path
+
+
+class SessionJournal:
+    """
+    Çizim işlemlerinin yalnızca eklemeli (append-only) ikili oturum günlüğü.
+    Kayıtlar bellekte biriktirilir, kısa aralıklarla tek bir write + fsync ile diske yazılır.
+    Çökme sonrası tuval, günlük yeniden oynatılarak kurtarılır.
+
+    Dosya biçimi: MAGIC, <II (tuval genişliği, yüksekliği), ardından her kayıt için
+    <IBI (yük uzunluğu, kayıt tipi, yükün crc32'si) ve yük. Yarım kalan son kayıt okunurken atlanır.
+    """
+    MAGIC = b"KKJ5"
+    RECORD_COMMAND = 1  # Yük: DrawCommand.to_bytes()
+    RECORD_UNDO = 2
+    RECORD_REDO = 3
+    RECORD_RESET = 4  # Yük: _pack_reset_payload() (yeni başlangıç görüntüsü); geçmiş sıfırlanır
+    _CANVAS_HEADER = struct.Struct("<II")
+    _RECORD_HEADER = struct.Struct("<IBI")
+
+    def __init__(self, path, canvas_size):
+        self.path = path
+        self._pending = []
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, 'wb')
+        self._file.write(self.MAGIC + self._CANVAS_HEADER.pack(canvas_size.width(), canvas_size.height()))
+        self.flush(force=True)
+
+    def append(self, record_type, payload=b""):
+        """Kaydı yazma kuyruğuna ekler; diske bir sonraki flush() ile yazılır."""
+        self._pending.append(self._RECORD_HEADER.pack(len(payload), record_type, zlib.crc32(payload)) + payload)
+
+    def flush(self, force=False):
+        """Bekleyen kayıtları tek seferde yazar ve diske kalıcı olarak işler (fsync)."""
+        if self._file is None or (not self._pending and not force):
+            return
+        if self._pending:
+            self._file.write(b"".join(self._pending))
+            self._pending = []
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self, delete=False):
+        """Günlüğü kapatır. delete=True temiz kapanış demektir; dosya silinir."""
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+        if delete and os.path.exists(self.path):
+            os.remove(self.path)
+
+    @classmethod
+    def read_records(cls, path):
+        """
+        Günlük dosyasını okur; (genişlik, yükseklik, [(kayıt tipi, yük), ...]) döndürür.
+        Geçersiz dosyada None döner. Yarım yazılmış veya bozuk kayıtta okuma durur.
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        header_size = len(cls.MAGIC) + cls._CANVAS_HEADER.size
+        if len(data) < header_size or not data.startswith(cls.MAGIC):
+            return None
+        width, height = cls._CANVAS_HEADER.unpack_from(data, len(cls.MAGIC))
+        records = []
+        offset = header_size
+        while offset + cls._RECORD_HEADER.size <= len(data):
+            length, record_type, crc = cls._RECORD_HEADER.unpack_from(data, offset)
+            start = offset + cls._RECORD_HEADER.size
+            payload = data[start:start + length]
+            if len(payload) != length or zlib.crc32(payload) != crc:
+                _debug_print(f"Oturum günlüğünde yarım/bozuk kayıt, okuma {offset}. baytta durdu.")
+                break
+            records.append((record_type, payload))
+            offset = start + length
+        return width, height, records
+
+
+class PerformanceMetrics:
+    """
+    Zamanlama/sayaç örneklerini ad başına sınırlı bir pencerede, anlık değerleri (ör. undo belleği) ada göre tutar.
+    debug_mode açıkken PaintCanvasWindow HUD'unda gösterilir ve hata raporları için JSON olarak logs/ altına yazılabilir.
+    """
+    WINDOW = 600  # Ad başına saklanan son örnek sayısı (60 Hz'de ~10 saniye)
+
+    def __init__(self):
+        self._samples = {}
+        self._values = {}
+
+    def record(self, name, value):
+        """Bir örnek ekler; pencere dolduğunda en eski örnek düşer."""
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples[name] = collections.deque(maxlen=self.WINDOW)
+        samples.append(value)
+
+    def set_value(self, name, value):
+        self._values[name] = value
+
+    def value(self, name, default=None):
+        return self._values.get(name, default)
+
+    @staticmethod
+    def _percentile(ordered, fraction):
+        """Sıralı örneklerde en yakın sıra yöntemiyle yüzdelik."""
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+    def stats(self, name):
+        """Adın örnek istatistikleri (count, last, mean, p50, p95, p99, max); örnek yoksa None."""
+        samples = self._samples.get(name)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return {
+            "count": len(ordered),
+            "last": samples[-1],
+            "mean": sum(ordered) / len(ordered),
+            "p50": self._percentile(ordered, 0.50),
+            "p95": self._percentile(ordered, 0.95),
+            "p99": self._percentile(ordered, 0.99),
+            "max": ordered[-1],
+        }
+
+    def dump(self, path, extra=None):
+        """Tüm istatistikleri ve anlık değerleri JSON dosyasına yazar."""
+        data = {"created": datetime.datetime.now().isoformat(timespec="seconds")}
+        data.update(extra or {})
+        data["samples"] = {name: self.stats(name) for name in sorted(self._samples)}
+        data["values"] = dict(self._values)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+
+
+def _timed(metric_name):
+    """Metodun süresini (ms) debug_mode açıkken self.metrics'e metric_name adıyla kaydeden dekoratör."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not _DEBUG_MODE_ENABLED:
+                return method(self, *args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.metrics.record(metric_name, (time.perf_counter() - started) * 1000)
+        return wrapper
+    return decorator
+
+
+class PaintSessionPool:
+    """
+    Önceden oluşturulmuş, gizli PaintCanvasWindow'ların havuzu. Pencerenin pahalı kurulumu (araç penceresinin
+    uic.loadUi'si, stil sayfaları, tam ekran çizim katmanı, zamanlayıcılar) uygulama açılışında bir kez yapılır;
+    her oturum yalnızca yeni ekran görüntüsünü yerleştirir, katmanı yerinde temizler ve pencereyi gösterir.
+    Kapanan pencere havuza geri döner. Havuz boyutu app_config.json'daki 'paint_window_pool_size' ile ayarlanır
+    (0: havuz kapalı, her oturumda yeni pencere).
+    """
+    DEFAULT_POOL_SIZE = 1
+    PREWARM_DELAY_MS = 500  # Ana pencere ilk kez çizildikten sonra havuzun doldurulma gecikmesi
+    _idle = []  # Gizli, start_session() bekleyen pencereler
+    _active = set()  # Oturumu süren pencereler; Python referansı burada tutulur
+
+    @classmethod
+    def pool_size(cls, main_window):
+        """app_config.json'daki 'paint_window_pool_size' değeri; geçersizse varsayılan."""
+        value = main_window.app_config.get("paint_window_pool_size", cls.DEFAULT_POOL_SIZE)
+        try:
+            return max(0, int(value))
+        except (TypeError, ValueError):
+            log_error(f"Geçersiz 'paint_window_pool_size' değeri app_config.json'da: {value}")
+            return cls.DEFAULT_POOL_SIZE
+
+    @classmethod
+    def schedule_prewarm(cls, main_window):
+        """Havuzu olay döngüsü başladıktan sonra doldurur; açılış süresini uzatmaz."""
+        QTimer.singleShot(cls.PREWARM_DELAY_MS, lambda: cls.prewarm(main_window))
+
+    @classmethod
+    def prewarm(cls, main_window):
+        """Havuzu tam ekran boyama alanı boyutunda gizli pencerelerle 'paint_window_pool_size' kadar doldurur."""
+        try:
+            screens = _screens_for_capture(main_window.app_config.get("capture_screens", "all"))
+            canvas_rect = _virtual_rect(screens)
+            while len(cls._idle) < cls.pool_size(main_window):
+                started = time.perf_counter()
+                cls._idle.append(PaintCanvasWindow(None, QColor(main_window.active_color), main_window.active_size,
+                                                   main_window, canvas_rect))
+                _debug_print(f"Çizim penceresi havuza hazırlandı: {(time.perf_counter() - started) * 1000:.1f} ms")
+        except Exception as e:
+            log_error(f"Çizim penceresi havuzu hazırlanırken hata: {e}", sys.exc_info())
+
+    @classmethod
+    def acquire(cls, main_window, background_pixmap, brush_color, brush_size, canvas_rect=None):
+        """Yeni oturum için bir pencere döndürür: havuzda bekleyen varsa onu, yoksa yeni oluşturulanı."""
+        if cls._idle:
+            window = cls._idle.pop()
+            window.start_session(background_pixmap, brush_color, brush_size, canvas_rect)
+        else:
+            window = PaintCanvasWindow(background_pixmap, brush_color, brush_size, main_window, canvas_rect)
+        cls._active.add(window)
+        return window
+
+    @classmethod
+    def release(cls, window):
+        """Oturumu kapanan pencereyi havuza geri alır; havuz doluysa pencere silinir."""
+        cls._active.discard(window)
+        if window in cls._idle:
+            return
+        if len(cls._idle) < cls.pool_size(window.main_window_ref):
+            cls._idle.append(window)
+        else:
+            window.deleteLater()
+
+
 class PaintCanvasWindow(QMainWindow):
     """
     A window that displays a screenshot and allows the user to draw on it
     with various tools (pen, eraser, shapes, highlighter).
     It also hosts the ToolWindow.
     """
-    MAX_UNDO_STATES = 10  # Maximum number of states to keep in the undo stack
+    UNDO_CHECKPOINT_INTERVAL = 20  # Her N komutta bir raster kontrol noktası alınır
+    JOURNAL_FLUSH_INTERVAL_MS = 250  # Oturum günlüğündeki bekleyen kayıtların diske yazılma gecikmesi
+    DEFAULT_UNDO_MEMORY_BUDGET_MB = 256  # app_config.json'da 'undo_memory_budget_mb' yoksa kullanılır
     AUTO_SAVE_INTERVAL_MS = 5000  # Auto-save interval in milliseconds (5 seconds)
+    DEFAULT_FRAME_RATE = 60  # Ekran yenileme hızı alınamazsa darbe örneklerinin çizilme sıklığı (Hz)
+    SCRATCH_GROW_MARGIN = 64  # Karalama görüntüsü büyütülürken eklenen pay; her karede yeniden ayırmayı önler (piksel)
+    HUD_REFRESH_INTERVAL_MS = 250  # debug_mode'daki performans HUD'unun yenilenme aralığı
+    HUD_RECT = QRect(10, 10, 360, 140)  # HUD'un pencere içindeki alanı
 
     def __init__(self, background_pixmap, initial_brush_color, initial_brush_size,
-                 main_window_ref):  # Get main window reference
+                 main_window_ref, canvas_rect=None):  # Get main window reference
+        """
+        Pencereyi ve oturumlar arasında yeniden kullanılan ağır parçalarını (çizim katmanı, zamanlayıcılar,
+        araç penceresi) kurar. background_pixmap None ise pencere gizli ve oturumsuz kalır; PaintSessionPool
+        böyle önceden oluşturulmuş pencereleri start_session() ile açar.
+        """
         super().__init__()
         self.setWindowTitle("Taşınabilir Görsel ve Çizim Alanı")
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
 
         self.main_window_ref = main_window_ref  # Store the reference
-
-        # Store a copy of the background pixmap
-        self.background_pixmap = background_pixmap.copy()
-
-        # Get screen dimensions for fullscreen behavior
-        screen_rect = QApplication.primaryScreen().geometry()
+        self._session_active = False  # start_session() ile açılır, closeEvent ile kapanır
+
+        # Ekran görüntüsü (HiDPI'da devicePixelRatio etiketli; yerleşim mantıksal boyutla yapılır) start_session()'da atanır
+        self.background_pixmap = QPixmap()
+        self._background_task = None  # Yerine geçecek yumuşak ölçeklenmiş görüntüyü üreten BackgroundImageTask
+        self._background_task_key = None  # İş başladığındaki background_pixmap.cacheKey()
+        self._background_task_ratio = 1.0
+        # Havuzda bekleyen işler: setAutoDelete(False) ile Python'a ait oldukları için sonuç gelene kadar burada tutulur
+        self._background_tasks_in_flight = set()
+
+        # Get screen dimensions for fullscreen behavior (canvas_rect: birden çok ekranı kaplayan sanal masaüstü alanı)
+        screen_rect = canvas_rect if canvas_rect is not None else QApplication.primaryScreen().geometry()
         # Set the window to full screen.
         self.setGeometry(screen_rect)  # This makes the canvas cover the whole screen.
-
-        # Calculate initial position to center the background pixmap on the full screen canvas
-        # This is the actual position of the image within this window.
-        self.image_pos = QPoint(
-            int((screen_rect.width() - self.background_pixmap.width()) / 2),
-            int((screen_rect.height() - self.background_pixmap.height()) / 2)
-        )
+        self.image_pos = QPoint()  # This is the actual position of the image within this window.
 
         # Create an empty overlay image to draw on. Its size matches the window size.
-        # Her zaman boş bir tuvalle başla
+        # Katman bir kez ayrılır; aynı boyuttaki sonraki oturumlar onu yerinde temizler (bkz. _prepare_overlay)
+        self.overlay_store = None
         self.overlay_image = QImage(self.size(), QImage.Format_ARGB32)
         self.overlay_image.fill(Qt.transparent)
 
+        # İçerik nesli: her komut ve her geçmiş sıfırlaması benzersiz bir nesil alır. Ekrandaki içerik
+        # undo_index'teki komutun nesliyle tanımlanır, böylece undo+redo sonrası aynı değere döner.
+        # Sayaç oturumlar boyunca artmaya devam eder; önceki oturumun nesilleri yeniden kullanılmaz.
+        self._generation_counter = 0
+        self.journal = None  # SessionJournal; her oturumun başında açılır
+        self._reset_session_state(initial_brush_color, initial_brush_size)
+
+        # Darbe örnekleri her fare olayında değil, ekran yenileme hızında (kapsanan en hızlı ekran) toplu olarak çizilir
+        self.stroke_frame_timer = QTimer(self)
+        self.stroke_frame_timer.setTimerType(Qt.PreciseTimer)
+        self.stroke_frame_timer.setSingleShot(True)
+        self.stroke_frame_timer.timeout.connect(self._flush_stroke_samples)
+
+        # Performans sayaçları (yalnızca debug_mode açıkken toplanır) ve HUD'u yenileyen zamanlayıcı
+        self.metrics = PerformanceMetrics()
+        self._input_pending_since = None  # Henüz ekrana yansımamış ilk giriş örneğinin zamanı (perf_counter)
+        self._hud_visible = False
+        self.hud_timer = QTimer(self)
+        self.hud_timer.setInterval(self.HUD_REFRESH_INTERVAL_MS)
+        self.hud_timer.timeout.connect(self._refresh_hud)
+
+        # Önbelleğe alınmış arka plan katmanı (dolgu, ekran görüntüsü, çerçeve, boyutlandırma tutamacı), ekran başına bir tane.
+        # Yalnızca önbellek anahtarı değiştiğinde (görsel konumu/boyutu, beyaz tahta modu, pencere boyutu) ve o ekran
+        # yeniden boyandığında yeniden çizilir; böylece her monitör bağımsız güncellenir.
+        self._backdrop_caches = {}  # ekran indeksi -> (anahtar, QPixmap)
+        self._screen_rects = []
+        self._screen_rects_key = None
+
+        # Auto-save timer setup
+        self.auto_save_timer = QTimer(self)
+        self.auto_save_timer.setInterval(self.AUTO_SAVE_INTERVAL_MS)
+        self.auto_save_timer.setSingleShot(True)  # Ensure it only fires once after inactivity
+        self.auto_save_timer.timeout.connect(self._save_current_drawing_auto)
+        # Otomatik kayıt kodlaması için tek iş parçacıklı havuz; aynı anda en fazla bir kayıt yazılır
+        self._auto_save_pool = QThreadPool(self)
+        self._auto_save_pool.setMaxThreadCount(1)
+        self._auto_save_task = None  # Devam eden AutoSaveTask
+        self._auto_save_pending = False  # Kayıt sürerken yeni bir kayıt istendi mi?
+        self._auto_save_file = None  # TiledAutoSaveFile; her oturumun başında oluşturulur
+
+        # Oturum günlüğü: kayıtlar toplanır ve kısa bir gecikmeyle toplu olarak fsync edilir
+        self.journal_flush_timer = QTimer(self)
+        self.journal_flush_timer.setInterval(self.JOURNAL_FLUSH_INTERVAL_MS)
+        self.journal_flush_timer.setSingleShot(True)
+        self.journal_flush_timer.timeout.connect(self._flush_journal)
+
+        # Create move image button
+        self.move_image_btn = QPushButton("Görseli Taşı", self)
+        self.move_image_btn.setStyleSheet("""
+            QPushButton {
+                background-color: rgba(100, 100, 100, 150); /* Semi-transparent dark gray */
+                color: white;
+                border: 1px solid rgba(255, 255, 255, 100);
+                border-radius: 5px;
+                padding: 5px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: rgba(120, 120, 120, 180);
+            }
+            QPushButton:pressed {
+                background-color: rgba(80, 80, 80, 200);
+            }
+        """)
+        # Connect to a new method that handles the button text change
+        self.move_image_btn.clicked.connect(self._toggle_move_tool)
+        self.move_image_btn.setFixedSize(120, 30)
+        self.move_image_btn.hide()
+
+        # Initialize the tool window (oturum başladığında gösterilir)
+        self.tool_window = ToolWindow(self, self.main_window_ref.app_config)  # app_config'i ToolWindow'a ilet
+
+        if background_pixmap is not None:
+            self.start_session(background_pixmap, initial_brush_color, initial_brush_size, canvas_rect)
+
+    def _reset_session_state(self, brush_color, brush_size):
+        """
+        Oturuma özgü durumu (undo geçmişi, fırça, araç ve darbe durumu) başlangıç değerlerine döndürür.
+        Çizim katmanı boş olmalıdır (yeni ayrılmış veya _prepare_overlay ile temizlenmiş).
+        """
         # --- Undo/Redo için eklenenler ---
-        self.undo_stack = []
+        # command_log çizim belgesidir (DrawCommand listesi); undo_index son uygulanan komutu gösterir
+        # (-1: başlangıç durumu). _checkpoints, komut indeksinden o komut sonrasındaki RasterCheckpoint'e eşler.
+        self.command_log = []
         self.undo_index = -1
-
-        # Başlangıçtaki boş tuval durumunu kaydet (sadece bir kez, pencere ilk açıldığında)
-        # Bu, undo yığınının ilk boş haliyle başlamasını sağlar
-        # save_drawing_state() now also triggers auto-save debounce
-        self.save_drawing_state()
+        self._checkpoints = {}
+        # Geçmiş için bellek bütçesi (adım sayısı yerine bayt); app_config.json'dan okunur
+        self.undo_memory_budget = int(self.main_window_ref.app_config.get(
+            "undo_memory_budget_mb", self.DEFAULT_UNDO_MEMORY_BUDGET_MB) * 1024 * 1024)
+        self._current_command = None  # Devam eden kalem/vurgulayıcı/silgi darbesi
+        self._auto_save_dirty_rect = QRect()  # Son otomatik kayıttan bu yana değişen alan
+        self._base_generation = 0  # undo_index == -1 iken (başlangıç durumu) içeriğin nesli
+        # İçerik kapsamı: görünür çizimi kapsayan dikdörtgen. Taramak yerine her komutta güncellenir;
+        # komutların .extent alanında saklandığı için undo/redo'da da O(1)'dir.
+        self._base_extent = QRect()  # undo_index == -1 iken içerik kapsamı
+        self._saved_generation = None  # Diskteki (veya yazılmakta olan) otomatik kaydın nesli
+        self._reset_undo_history(QRect())  # Katman az önce temizlendi; 4K'da ~10 ms süren tarama gereksiz
+        self._session_base_generation = self._base_generation  # Oturum başındaki boş tuvalin nesli
         _debug_print("PaintCanvasWindow başlatıldı, boş tuvalle başlandı.")
 
         # --- Undo/Redo için eklenenler SONU ---
 
         # Drawing properties
-        self.brush_color = initial_brush_color
-        self.brush_size = initial_brush_size
-        self.brush_alpha = initial_brush_color.alpha()  # Initialize brush_alpha from the color passed
+        self.brush_color = brush_color
+        self.brush_size = brush_size
+        self.brush_alpha = brush_color.alpha()  # Initialize brush_alpha from the color passed
 
         self.smoothing_factor = 0  # Default to no smoothing (0)
         self.is_smoothing_enabled = False  # New flag: Is smoothing actively enabled by the checkbox?
@@ -800,7 +2593,6 @@ class PaintCanvasWindow(QMainWindow):
         self.current_preview_rect = QRect()  # Stores the rectangle for resize preview
 
         self.last_point = QPoint()  # Last point for continuous drawing (pen/eraser) - actual mouse position
-        self.last_drawn_point = QPoint()  # Last point that was actually drawn to (for smoothing)
         self.temp_start_point = QPoint()  # Start point for shape tools (line, rect, ellipse)
         self.temp_end_point = QPoint()  # End point for shape tools
 
@@ -808,43 +2600,94 @@ class PaintCanvasWindow(QMainWindow):
 
         self.painter = None  # Initialize painter for continuous drawing
 
-        # Auto-save timer setup
-        self.auto_save_timer = QTimer(self)
-        self.auto_save_timer.setInterval(self.AUTO_SAVE_INTERVAL_MS)
-        self.auto_save_timer.setSingleShot(True)  # Ensure it only fires once after inactivity
-        self.auto_save_timer.timeout.connect(self._save_current_drawing_auto)
+        # Kalem/vurgulayıcı darbeleri için filtre zinciri ve tahmin (darbe başında kurulur)
+        self._stroke_filter = None
+        self._stroke_predictor = None
+        self._predicted_segment = None  # Ekranda gösterilen, kaydedilmeyen tahmin ucu (QLineF)
 
-        # Create move image button
-        self.move_image_btn = QPushButton("Görseli Taşı", self)
-        self.move_image_btn.setStyleSheet("""
-            QPushButton {
-                background-color: rgba(100, 100, 100, 150); /* Semi-transparent dark gray */
-                color: white;
-                border: 1px solid rgba(255, 255, 255, 100);
-                border-radius: 5px;
-                padding: 5px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: rgba(120, 120, 120, 180);
-            }
-            QPushButton:pressed {
-                background-color: rgba(80, 80, 80, 200);
-            }
-        """)
-        # Connect to a new method that handles the button text change
-        self.move_image_btn.clicked.connect(self._toggle_move_tool)
-        self.move_image_btn.setFixedSize(120, 30)
+        # Yarı saydam darbenin çizildiği karalama görüntüsü ve katmandaki konumu (bkz. DrawCommand.uses_scratch_layer)
+        self._scratch_image = None
+        self._scratch_rect = QRect()
+
+    def _prepare_overlay(self, size):
+        """
+        Oturumun boş çizim katmanını hazırlar. Bellekteki katman boyut aynıysa yeniden ayrılmadan yerinde
+        temizlenir; "overlay_backing_store": "mmap" ise her oturum kendi eşlenmiş dosyasını oluşturur.
+        """
+        if self.main_window_ref.app_config.get("overlay_backing_store", "memory") == "mmap":
+            self.overlay_store = self._create_overlay_store(size)
+        if self.overlay_store is not None:
+            self.overlay_image = self.overlay_store.image
+        elif self.overlay_image.size() == size:
+            # Önceki geçmişin kontrol noktaları katmanla pikselleri paylaşır; önce bırakılır ki fill() katmanı kopyalamasın
+            self._checkpoints = {}
+            self.overlay_image.fill(Qt.transparent)
+        else:
+            self.overlay_image = QImage(size, QImage.Format_ARGB32)
+            self.overlay_image.fill(Qt.transparent)
+
+    def start_session(self, background_pixmap, brush_color, brush_size, canvas_rect=None):
+        """
+        Yeni bir çizim oturumu başlatır: ekran görüntüsünü yerleştirir, katmanı ve undo geçmişini sıfırlar,
+        oturum günlüğünü açar ve araç penceresini konumlandırır. Pencerenin kendisi çağıran tarafından gösterilir.
+        """
+        started = time.perf_counter()
+        # Get screen dimensions for fullscreen behavior (canvas_rect: birden çok ekranı kaplayan sanal masaüstü alanı)
+        screen_rect = canvas_rect if canvas_rect is not None else QApplication.primaryScreen().geometry()
+        # Önceki oturum showFullScreen() ile açıldıysa tam ekran durumu geometriyi ezmesin
+        self.setWindowState(Qt.WindowNoState)
+        self.setGeometry(screen_rect)
+
+        # Store a copy of the background pixmap (HiDPI'da devicePixelRatio etiketli; yerleşim mantıksal boyutla yapılır).
+        # Örtük paylaşımlı kopya: pikseller ancak biri değiştirilirse kopyalanır (4K'da derin kopya ~20 ms)
+        self.background_pixmap = QPixmap(background_pixmap)
+        self._background_task = None
+        self._background_task_key = None
+        self._background_task_ratio = 1.0
+
+        # Calculate initial position to center the background pixmap on the full screen canvas
+        # This is the actual position of the image within this window.
+        self.image_pos = QPoint(
+            int((screen_rect.width() - self._image_size().width()) / 2),
+            int((screen_rect.height() - self._image_size().height()) / 2)
+        )
+
+        # Her zaman boş bir tuvalle başla
+        self._prepare_overlay(screen_rect.size())
+        self._reset_session_state(brush_color, brush_size)
+        self.unsetCursor()
+
+        refresh_rate = max((screen.refreshRate() for screen in QApplication.screens()
+                            if screen.geometry().intersects(screen_rect)), default=0) or self.DEFAULT_FRAME_RATE
+        self.stroke_frame_timer.setInterval(max(1, int(1000 / refresh_rate)))
+        self.metrics = PerformanceMetrics()
+        self.metrics.set_value("screen_refresh_rate_hz", refresh_rate)
+        self._input_pending_since = None
+        self.hud_timer.start()
+
+        self._backdrop_caches = {}
+        self._screen_rects = []
+        self._screen_rects_key = None
+
+        self._auto_save_task = None
+        self._auto_save_pending = False
+        auto_save_codec = self.main_window_ref.app_config.get("auto_save_codec", _DEFAULT_AUTO_SAVE_CODEC)
+        if auto_save_codec not in _AUTO_SAVE_CODECS:
+            log_error(f"Geçersiz 'auto_save_codec' değeri app_config.json'da: {auto_save_codec}")
+            auto_save_codec = _DEFAULT_AUTO_SAVE_CODEC
+        self._auto_save_file = TiledAutoSaveFile(_AUTO_SAVE_TILES_FILE, auto_save_codec)
+        self._open_session_journal()
 
         # Determine button visibility: If it's a full-screen screenshot, the move button is less useful.
         # It's primarily for cropped images within a larger drawing area.
-        if self.background_pixmap.isNull() or (self.background_pixmap.size() == screen_rect.size()):
+        self.move_image_btn.setText("Görseli Taşı")
+        if self.background_pixmap.isNull() or (self._image_size() == screen_rect.size()):
             self.move_image_btn.hide()
         else:
             self.move_image_btn.show()
             # Calculate the position above the center of the image's top edge
             button_width = self.move_image_btn.width()
-            image_width = self.background_pixmap.width()
+            image_width = self._image_size().width()
             image_x = self.image_pos.x()
             image_y = self.image_pos.y()
 
@@ -853,8 +2696,7 @@ class PaintCanvasWindow(QMainWindow):
 
             self.move_image_btn.move(button_x, button_y)
 
-        # Initialize and show the tool window
-        self.tool_window = ToolWindow(self, self.main_window_ref.app_config)  # app_config'i ToolWindow'a ilet
+        # Show the tool window
         self.tool_window.show()
 
         # Position tool window using offsets from app_config.json
@@ -875,8 +2717,12 @@ class PaintCanvasWindow(QMainWindow):
             # Fallback to default positioning if config is missing
             self.tool_window.move(self.x() + self.width() - self.tool_window.width() - 20, self.y() + 20)
 
-        # Ensure the tool window's selected color indicator is updated on init
-        self.tool_window.set_selected_color_indicator(self.brush_color)
+        # Araç penceresinin kontrollerini (renk göstergesi, boyut, opaklık, yumuşatma) yeni oturuma eşitle
+        self.tool_window.sync_with_paint_window()
+
+        self._session_active = True
+        self.metrics.set_value("session_start_ms", (time.perf_counter() - started) * 1000)
+        _debug_print(f"Çizim oturumu {self.metrics.value('session_start_ms'):.1f} ms'de hazırlandı.")
 
     def _toggle_move_tool(self):
         """Toggles the move tool on/off and updates the button text."""
@@ -970,35 +2816,567 @@ class PaintCanvasWindow(QMainWindow):
     def clear_all_drawings(self):
         """Çizim katmanındaki tüm çizimleri temizler ve geri alma/yineleme yığınını sıfırlar."""
         try:
-            self.overlay_image.fill(Qt.transparent)  # Çizim katmanını şeffaf renkle doldur
-            self.save_drawing_state()  # Yeni boş durumu kaydet (undo stack için)
+            command = DrawCommand("clear")
+            self._apply_command(command)  # Çizim katmanını şeffaf renkle doldur
+            self.save_drawing_state(command)  # Yeni boş durumu kaydet (undo stack için)
             self.update()  # Tuvalin temizlendiğini göstermek için yeniden boyama iste
             # Auto-save will be triggered by save_drawing_state()
         except Exception as e:
             log_error(f"Çizimleri temizlerken hata: {e}", sys.exc_info())
 
-    def save_drawing_state(self):
-        """Çizim katmanının mevcut durumunu geri alma yığınına kaydeder."""
+    @staticmethod
+    def _segment_rect(p1, p2, width):
+        """İki nokta arasındaki çizgi parçasının kalem kalınlığı kadar genişletilmiş sınır dikdörtgeni."""
+        margin = int(width / 2) + 2  # Yuvarlak uçlar ve antialiasing payı
+        return QRect(p1, p2).normalized().adjusted(-margin, -margin, margin, margin)
+
+    def _begin_stroke(self, pos, timestamp, pressure=None, tilt=(0, 0)):
+        """Kalem/vurgulayıcı/silgi darbesini başlatır; pressure verilirse (tablet) darbe basınçlıdır."""
+        # Darbe, çizim belgesine eklenecek bir komut olarak kaydedilir.
+        # Silgi kalınlığı için self.eraser_size, diğerleri için brush_size (ve brush_color'ın alfası)
+        self._current_command = DrawCommand(
+            "stroke", self.active_tool, self.brush_color,
+            self.eraser_size if self.active_tool == "eraser" else self.brush_size,
+            self.line_style, [DrawCommand.quantize_point(pos)])
+        if pressure is not None:
+            self._current_command.pressures.append(DrawCommand.quantize_pressure(pressure))
+            self._current_command.tilts.append(tilt)
+        # Komutla aynı kalem ve birleştirme modu (silgi: Clear, diğerleri: SourceOver)
+        self._scratch_image = None
+        self._scratch_rect = QRect()
+        if self._current_command.uses_scratch_layer():
+            self._ensure_scratch_covers(self._current_command.bounds(self.overlay_image.rect()))
+        else:
+            self._detach_overlay()
+            self.painter = self._current_command.begin_painter(self.overlay_image)
+
+        # Only apply smoothing if the flag is enabled AND smoothing_factor is > 0 (silgide filtre yok)
+        self._stroke_filter = None
+        self._stroke_predictor = None
+        if self.active_tool in ["pen", "highlight"] and self.is_smoothing_enabled and self.smoothing_factor > 0:
+            config = self.main_window_ref.app_config
+            self._stroke_filter = StrokeFilterChain.from_config(
+                config.get("stroke_filters", ["one_euro", "catmull_rom"]), self.smoothing_factor)
+            self._stroke_filter.reset(pos, timestamp)
+            prediction_ms = config.get("stroke_prediction_ms", 0)
+            if prediction_ms > 0:
+                self._stroke_predictor = StrokePredictor(prediction_ms)
+                self._stroke_predictor.reset(pos, timestamp)
+
+    def _add_stroke_sample(self, pos, timestamp, pressure=None, tilt=(0, 0)):
+        """Bir giriş örneğini (gerekirse filtreden geçirerek) darbeye ekler."""
+        if _DEBUG_MODE_ENABLED and self._input_pending_since is None:
+            self._input_pending_since = time.perf_counter()  # Giriş-ekran gecikmesi paintEvent'te ölçülür
+        if self._stroke_predictor is not None:
+            self._stroke_predictor.update(pos, timestamp)
+        if self._stroke_filter is None:
+            # No smoothing (or eraser): the raw input position is used
+            self._queue_stroke_point(QPointF(pos), pressure, tilt)
+            return
+        for point in self._stroke_filter.push(pos, timestamp):
+            self._queue_stroke_point(point, pressure, tilt)
+
+    def _queue_stroke_point(self, point, pressure=None, tilt=(0, 0)):
+        """Darbeye bir örnek ekler; çizim bir sonraki kare zamanlayıcısında toplu yapılır."""
+        self._current_command.points.append(DrawCommand.quantize_point(point))
+        if self._current_command.pressures:
+            pressure = 1.0 if pressure is None else pressure
+            self._current_command.pressures.append(DrawCommand.quantize_pressure(pressure))
+            self._current_command.tilts.append(tilt)
+        if not self.stroke_frame_timer.isActive():
+            self.stroke_frame_timer.start()
+
+    def _ensure_scratch_covers(self, rect):
+        """
+        Karalama görüntüsünü, katman sınırları içinde rect'i kapsayacak şekilde (gerekirse payla) büyütür.
+        Eski içerik yeni görüntüye kopyalanır ve darbe kalemi yeni görüntü üzerinde yeniden açılır.
+        """
+        rect = rect.intersected(self.overlay_image.rect())
+        if rect.isEmpty() or self._scratch_rect.contains(rect):
+            return
+        margin = self.SCRATCH_GROW_MARGIN
+        new_rect = self._scratch_rect.united(rect).adjusted(-margin, -margin, margin, margin)
+        new_rect = new_rect.intersected(self.overlay_image.rect())
+        new_scratch = QImage(new_rect.size(), QImage.Format_ARGB32_Premultiplied)
+        new_scratch.fill(Qt.transparent)
+        if self.painter and self.painter.isActive():
+            self.painter.end()
+        if self._scratch_image is not None:
+            copy_painter = QPainter(new_scratch)
+            copy_painter.setCompositionMode(QPainter.CompositionMode_Source)
+            copy_painter.drawImage(self._scratch_rect.topLeft() - new_rect.topLeft(), self._scratch_image)
+            copy_painter.end()
+        self._scratch_image = new_scratch
+        self._scratch_rect = new_rect
+        self.painter = self._current_command.begin_painter(self._scratch_image)
+        self.painter.translate(-new_rect.topLeft())  # Darbe noktaları pencere koordinatlarında kalır
+        _debug_print(f"Karalama görüntüsü büyütüldü: {new_rect}")
+
+    def _end_stroke(self):
+        """Bekleyen örnekleri çizip darbeyi bitirir; darbe komutunu (yoksa None) döndürür."""
+        # Filtrede bekleyen son noktaları ve son kareden kalan darbe örneklerini çiz
+        if self._stroke_filter is not None:
+            pressures = self._current_command.pressures if self._current_command is not None else []
+            for point in self._stroke_filter.finish():
+                self._queue_stroke_point(point, pressures[-1] if pressures else None)
+            self._stroke_filter = None
+        self._stroke_predictor = None
+        self.stroke_frame_timer.stop()
+        self._flush_stroke_samples()
+        self._set_predicted_segment(None)
+        # End continuous drawing painter if active
+        if self.painter and self.painter.isActive():
+            self.painter.end()
+            self.painter = None
+        command = self._current_command
+        self._current_command = None
+        if self._scratch_image is not None:
+            # Yarı saydam darbe katmana tek seferde birleştirilir
+            self._detach_overlay()
+            command.composite_scratch(self.overlay_image, self._scratch_image, self._scratch_rect.topLeft())
+            self.update(self._scratch_rect)
+            self._scratch_image = None
+            self._scratch_rect = QRect()
+        return command
+
+    def _flush_stroke_samples(self):
+        """
+        Son kareden bu yana biriken darbe örneklerini tek bir drawPolyline ile çizim katmanına çizer
+        ve yalnızca kapsadıkları alanı yeniden boyar. Çizim maliyeti giriş hızıyla değil kare hızıyla sınırlıdır.
+        """
+        try:
+            command = self._current_command
+            if command is None or self.painter is None:
+                return
+            start = command.breaks[-1] if command.breaks else 0
+            end = len(command.points) - 1
+            if end <= start:
+                return
+            polyline = QPolygonF(command.points[start:end + 1])
+            margin = int(command.width / 2) + 2  # Yuvarlak uçlar ve antialiasing payı
+            dirty_rect = polyline.boundingRect().toAlignedRect().adjusted(-margin, -margin, margin, margin)
+            if self._scratch_image is not None:
+                self._ensure_scratch_covers(dirty_rect)
+            if command.pressures:
+                command.draw_pressure_segments(self.painter, start, end)  # Değişken kalınlık: parça parça
+            else:
+                self.painter.drawPolyline(polyline)
+            command.breaks.append(end)  # Yeniden oynatmada aynı parçalama kullanılır
+            self.update(dirty_rect)
+            if self._stroke_predictor is not None:
+                last_point = command.points[-1]
+                self._set_predicted_segment(QLineF(last_point, self._stroke_predictor.predict(last_point)))
+        except Exception as e:
+            log_error(f"Darbe örnekleri çizilirken hata: {e}", sys.exc_info())
+
+    def _set_predicted_segment(self, segment):
+        """Ekranda gösterilen tahmin ucunu değiştirir; eski ve yeni ucun alanını yeniden boyar."""
+        margin = int(self._current_command.width / 2) + 2 if self._current_command is not None else 2
+        for line in (self._predicted_segment, segment):
+            if line is not None:
+                rect = QRectF(line.p1(), line.p2()).normalized().toAlignedRect()
+                self.update(rect.adjusted(-margin, -margin, margin, margin))
+        self._predicted_segment = segment
+
+    def _refresh_hud(self):
+        """debug_mode açıkken HUD alanını yeniden boyar; kapatıldığında HUD'u bir kez siler."""
         try:
-            # Mevcut indeksin ötesindeki tüm durumları sil
-            while len(self.undo_stack) > self.undo_index + 1:
-                self.undo_stack.pop()
+            if _DEBUG_MODE_ENABLED:
+                # Artımlı tutulan toplam okunur; kontrol noktası kilitleri alınmaz, HUD ölçtüğü takılmaları üretmez
+                self.metrics.set_value("undo_memory_bytes", self._history_bytes.total())
+                self.metrics.set_value("undo_memory_budget_bytes", self.undo_memory_budget)
+                self._hud_visible = True
+                self.update(self.HUD_RECT)
+            elif self._hud_visible:
+                self._hud_visible = False
+                self.update(self.HUD_RECT)
+        except Exception as e:
+            log_error(f"Performans HUD'u yenilenirken hata: {e}", sys.exc_info())
+
+    def _hud_lines(self):
+        """HUD'da gösterilen satırlar."""
+        def line(label, name):
+            stats = self.metrics.stats(name)
+            if stats is None:
+                return f"{label:<13} -"
+            return f"{label:<13} p50 {stats['p50']:6.2f}  p95 {stats['p95']:6.2f}  max {stats['max']:6.2f}"
+
+        repaint = self.metrics.stats("repaint_area_px")
+        undo_mb = self.metrics.value("undo_memory_bytes", 0) / (1024 * 1024)
+        budget_mb = self.undo_memory_budget / (1024 * 1024)
+        return [
+            line("paint ms", "paint_ms"),
+            line("latency ms", "input_latency_ms"),
+            line("mouse move ms", "mouse_move_ms"),
+            line("save state ms", "save_drawing_state_ms"),
+            line("auto-save ms", "auto_save_ms"),
+            f"{'repaint px':<13} last {repaint['last'] if repaint else 0:,.0f}  mean {repaint['mean'] if repaint else 0:,.0f}",
+            f"{'undo memory':<13} {undo_mb:.1f} / {budget_mb:.0f} MB",
+            "F12: metrikleri logs/ altına kaydet",
+        ]
+
+    def _draw_hud(self, painter):
+        """Performans HUD'unu pencerenin sol üst köşesine çizer."""
+        painter.save()
+        painter.setOpacity(1.0)
+        painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+        painter.fillRect(self.HUD_RECT, QColor(0, 0, 0, 170))
+        font = QFont("Monospace", 8)
+        font.setStyleHint(QFont.TypeWriter)
+        painter.setFont(font)
+        painter.setPen(QColor(120, 255, 120))
+        painter.drawText(self.HUD_RECT.adjusted(6, 4, -6, -4), Qt.AlignLeft | Qt.AlignTop, "\n".join(self._hud_lines()))
+        painter.restore()
+
+    def dump_performance_metrics(self):
+        """Performans sayaçlarını hata raporları için logs/ altına JSON olarak yazar; dosya yolunu döndürür."""
+        try:
+            self.metrics.set_value("undo_memory_bytes", self._history_bytes.total())
+            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            path = os.path.join(os.path.dirname(__file__), 'logs', f"performance_metrics_{timestamp}.json")
+            self.metrics.dump(path, {
+                "canvas_size": [self.overlay_image.width(), self.overlay_image.height()],
+                "undo_memory_budget_bytes": self.undo_memory_budget,
+                "command_count": len(self.command_log),
+                "overlay_backing_store": "mmap" if self.overlay_store is not None else "memory",
+            })
+            _debug_print(f"Performans metrikleri kaydedildi: {path}")
+            return path
+        except Exception as e:
+            log_error(f"Performans metrikleri kaydedilirken hata: {e}", sys.exc_info())
+            return None
 
-            # Yeni durum ekle
-            copied_image = QImage(self.overlay_image.size(), self.overlay_image.format())
-            painter = QPainter(copied_image)
-            painter.drawImage(0, 0, self.overlay_image)
-            painter.end()
+    def _mark_auto_save_dirty(self, rect):
+        """Bir sonraki otomatik kayıtta yazılacak alanı genişletir."""
+        self._auto_save_dirty_rect = self._auto_save_dirty_rect.united(rect)
+
+    def _create_overlay_store(self, size):
+        """
+        Bu oturumun mmap deposunu oluşturur; önceki oturumun dosyası 'Yükle' için saklanır.
+        Oluşturulamazsa None döner ve katman normal bellekte tutulur.
+        """
+        try:
+            if os.path.exists(_OVERLAY_BACKING_FILE):
+                os.replace(_OVERLAY_BACKING_FILE, _OVERLAY_BACKING_PREVIOUS_FILE)
+            return MappedOverlayStore.create(_OVERLAY_BACKING_FILE, size)
+        except Exception as e:
+            log_error(f"Bellek eşlemeli çizim katmanı oluşturulamadı: {e}", sys.exc_info())
+            return None
+
+    def _snapshot_overlay(self):
+        """
+        Çizim katmanının O(1) anlık görüntüsünü döndürür. Qt'nin örtük paylaşımı sayesinde
+        piksel verisi kopyalanmaz; kopya yalnızca katmana bir sonraki yazmada (_detach_overlay) yapılır.
+        mmap deposunda paylaşım, sonraki yazmada katmanı eşlenmiş dosyadan ayıracağı için derin kopya alınır.
+        """
+        if self.overlay_store is not None:
+            return self.overlay_image.copy()
+        return QImage(self.overlay_image)
+
+    def _replace_overlay(self, image):
+        """
+        Çizim katmanını verilen görüntüyle değiştirir. mmap deposunda katman eşlenmiş dosyada kalmalıdır;
+        bu yüzden görüntü atanmaz, pikselleri depoya kopyalanır (boyut değiştiyse depo yeniden oluşturulur).
+        """
+        if self.overlay_store is None:
+            self.overlay_image = image
+            return
+        if image.size() != self.overlay_store.size():
+            self.overlay_image = QImage()  # Kapatılacak eşlemeye referans kalmasın
+            path = self.overlay_store.path
+            self.overlay_store.close()
+            self.overlay_store = MappedOverlayStore.create(path, image.size())
+        self.overlay_image = self.overlay_store.image
+        painter = QPainter(self.overlay_image)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        painter.drawImage(0, 0, image)
+        painter.end()
+
+    def load_mapped_overlay(self, path):
+        """
+        mmap deposunda, önceki oturumun depo dosyasını okuma, kod çözme ve ölçekleme yapmadan
+        çizim katmanı olarak eşler. Dosya geçersizse veya tuval boyutu farklıysa False döner.
+        """
+        if self.overlay_store is None:
+            return False
+        if os.path.abspath(path) == os.path.abspath(self.overlay_store.path):
+            return True  # Bu dosya zaten eşlenmiş ve ekranda
+        store = MappedOverlayStore.open_existing(path)
+        if store is None:
+            return False
+        if store.size() != self.overlay_image.size():
+            store.close()
+            return False
+        previous_store = self.overlay_store
+        self.overlay_image = store.image
+        self.overlay_store = store
+        previous_store.close(delete=True)
+        self._reset_undo_history()
+        self.auto_save_timer.start()
+        self.update()
+        _debug_print(f"Çizim katmanı depo dosyasından eşlendi: {path}")
+        return True
+
+    def _detach_overlay(self):
+        """
+        Çizim katmanına yazmadan önce çağrılır: veri bir anlık görüntüyle paylaşılıyorsa
+        katman kendi kopyasına ayrılır (copy-on-write), böylece geçmişteki görüntüler değişmez.
+        """
+        if not self.overlay_image.isDetached():
+            self.overlay_image.detach()
+
+    def _apply_command(self, command):
+        """Komutu, gerekirse katmanı önce ayırarak, çizim katmanına uygular."""
+        self._detach_overlay()
+        command.render(self.overlay_image)
+
+    def _next_generation(self):
+        """Yeni, benzersiz bir içerik nesli döndürür."""
+        self._generation_counter += 1
+        return self._generation_counter
+
+    def _content_generation(self):
+        """Ekrandaki çizim içeriğinin nesli; aynı içerik (ör. undo ardından redo) aynı nesli verir."""
+        if self.undo_index >= 0:
+            return self.command_log[self.undo_index].generation
+        return self._base_generation
+
+    def _session_changed(self):
+        """Bu oturum tuvali değiştirdi mi (çizim, yükleme veya kurtarma)? Değiştirmediyse kapanışta kayıt ezilmez."""
+        return bool(self.command_log) or self._content_generation() != self._session_base_generation
+
+    def content_extent(self):
+        """Görünür çizimi kapsayan dikdörtgen (boşsa boş QRect). Tarama yapmaz, O(1)."""
+        if self.undo_index >= 0:
+            return self.command_log[self.undo_index].extent
+        return self._base_extent
+
+    def has_visible_content(self):
+        """Tuvalde görünür çizim var mı? Tarama yapmaz, O(1)."""
+        return not self.content_extent().isEmpty()
+
+    def _extent_after(self, command, extent):
+        """
+        Tuvale yeni uygulanmış komuttan sonraki içerik kapsamı. Kalem, vurgulayıcı ve şekiller kapsamı
+        büyütür; silgi yalnızca kapsamın tamamını örttüğünde, o alan içinde yeniden taranarak küçültülür
+        (aksi halde kapsam korunur, yani en kötü ihtimalle gerçek içerikten biraz büyüktür).
+        """
+        canvas_rect = self.overlay_image.rect()
+        if command.kind == "clear":
+            return QRect()
+        bounds = command.bounds(canvas_rect).intersected(canvas_rect)
+        if command.tool != "eraser":
+            return extent.united(bounds)
+        if not extent.isEmpty() and bounds.contains(extent):
+            return _visible_content_rect(self.overlay_image.copy(extent)).translated(extent.topLeft())
+        return extent
+
+    def _reset_undo_history(self, content_rect=None):
+        """
+        Komut geçmişini siler ve mevcut tuvali başlangıç kontrol noktası kabul eder.
+        content_rect, tuvalin bilinen içerik kapsamıdır (ör. yeni temizlenmiş katman için boş QRect);
+        verilmezse katman taranır.
+        """
+        self.command_log = []
+        self.undo_index = -1
+        self._base_generation = self._next_generation()
+        self._base_extent = _visible_content_rect(self.overlay_image) if content_rect is None else QRect(content_rect)
+        self._history_bytes = HistoryByteCounter()  # Eski kontrol noktaları eski sayaca yazar, bu toplamı etkilemez
+        self._checkpoints = {-1: self._new_checkpoint()}
+        self._mark_auto_save_dirty(self.overlay_image.rect())
+        self._journal_record(SessionJournal.RECORD_RESET, _pack_reset_payload(self.overlay_image, self._base_extent))
+
+    def _open_session_journal(self):
+        """
+        Yeni oturum günlüğünü açar. Önceki oturumdan kalmış bir günlük varsa (çökme),
+        kurtarma için saklanır; 'Yükle' butonu onu yeniden oynatır. Henüz kullanılmamış kurtarma günlükleri ezilmez.
+        """
+        try:
+            if os.path.exists(_SESSION_JOURNAL_FILE):
+                recovery_path = _next_recovery_journal_path()
+                os.replace(_SESSION_JOURNAL_FILE, recovery_path)
+                _debug_print(f"Önceki oturumun günlüğü kurtarma için saklandı: {recovery_path}")
+            self.journal = SessionJournal(_SESSION_JOURNAL_FILE, self.overlay_image.size())
+        except Exception as e:
+            self.journal = None
+            log_error(f"Oturum günlüğü açılamadı: {e}", sys.exc_info())
 
-            self.undo_stack.append(copied_image)
-            self.undo_index = len(self.undo_stack) - 1
+    def _journal_record(self, record_type, payload=b""):
+        """Oturum günlüğüne bir kayıt ekler ve toplu yazma zamanlayıcısını başlatır."""
+        if self.journal is None:
+            return
+        self.journal.append(record_type, payload)
+        if not self.journal_flush_timer.isActive():
+            self.journal_flush_timer.start()
 
-            # Yığın boyutunu kontrol et ve eski durumları sil
-            if len(self.undo_stack) > self.MAX_UNDO_STATES:
-                self.undo_stack.pop(0)  # En eski durumu sil
-                self.undo_index -= 1  # İndeksi de güncelle
+    def _flush_journal(self):
+        """Bekleyen günlük kayıtlarını diske yazar."""
+        try:
+            if self.journal is not None:
+                self.journal.flush()
+        except Exception as e:
+            log_error(f"Oturum günlüğü yazılırken hata: {e}", sys.exc_info())
 
-            _debug_print(f"Durum kaydedildi. Stack boyutu: {len(self.undo_stack)}, Index: {self.undo_index}")
+    def recover_from_journal(self, path):
+        """
+        Çökme sonrası kalan oturum günlüğünü yeniden oynatarak tuvali ve undo geçmişini kurar.
+        Komutlar önce mantıksal olarak işlenir, sonra tek geçişte çizilir ve tek bir yeniden boyama yapılır.
+        Kurtarılacak çizim bulunduysa True döner.
+        """
+        result = SessionJournal.read_records(path)
+        if result is None:
+            return False
+        width, height, records = result
+
+        base_image = QImage(width, height, QImage.Format_ARGB32)
+        base_image.fill(Qt.transparent)
+        commands = []
+        index = -1
+        for record_type, payload in records:
+            if record_type == SessionJournal.RECORD_COMMAND:
+                del commands[index + 1:]
+                commands.append(DrawCommand.from_bytes(payload))
+                index = len(commands) - 1
+            elif record_type == SessionJournal.RECORD_UNDO:
+                index = max(-1, index - 1)
+            elif record_type == SessionJournal.RECORD_REDO:
+                index = min(len(commands) - 1, index + 1)
+            elif record_type == SessionJournal.RECORD_RESET:
+                base_image = _unpack_reset_payload(payload)
+                commands = []
+                index = -1
+
+        if not commands and not _check_qimage_for_visible_content(base_image):
+            return False
+
+        if base_image.size() != self.overlay_image.size():
+            # Farklı ekran boyutunda kaydedilmiş: çiz, ölçekle ve geçmiş olmadan yükle
+            image = base_image.copy()
+            for command in commands[:index + 1]:
+                command.render(image)
+            self.set_overlay_image(image.scaled(self.overlay_image.size(), Qt.IgnoreAspectRatio,
+                                                Qt.SmoothTransformation))
+            return True
+
+        self._replace_overlay(base_image.copy())
+        self._reset_undo_history()
+        self.command_log = commands
+        self._history_bytes.add(sum(command.byte_size() for command in commands))
+        for command in commands:
+            command.generation = self._next_generation()
+        for i, command in enumerate(commands[:index + 1]):
+            previous_extent = self.content_extent()
+            self._apply_command(command)
+            command.extent = self._extent_after(command, previous_extent)
+            self.undo_index = i
+            if not command.resets_canvas() and i - self._nearest_restore_point(i) >= self.UNDO_CHECKPOINT_INTERVAL:
+                self._checkpoints[i] = self._new_checkpoint()
+        self.undo_index = index
+
+        # Kurtarılan geçmişi yeni oturumun günlüğüne de yaz
+        for command in commands:
+            self._journal_record(SessionJournal.RECORD_COMMAND, command.to_bytes())
+        for _ in range(len(commands) - 1 - index):
+            self._journal_record(SessionJournal.RECORD_UNDO)
+
+        self._enforce_undo_memory_budget()
+        self._compress_cold_checkpoints()
+        self.auto_save_timer.start()
+        self.update()  # Tüm yeniden oynatma için tek yeniden boyama
+        _debug_print(f"Oturum günlüğünden {len(commands)} komut kurtarıldı, index: {index}")
+        return True
+
+    def _history_byte_size(self):
+        """Komutların ve kontrol noktalarının toplam yaklaşık bellek kullanımı (artımlı tutulan toplam)."""
+        return self._history_bytes.total()
+
+    def _new_checkpoint(self):
+        """Mevcut tuvalin, boyutu geçmiş toplamına yansıtılan kontrol noktası."""
+        return RasterCheckpoint(self._snapshot_overlay(), self._history_bytes)
+
+    def _drop_history(self, commands, checkpoints):
+        """Geçmişten çıkarılan komut ve kontrol noktalarının boyutunu toplamdan düşer."""
+        self._history_bytes.add(-sum(command.byte_size() for command in commands))
+        for checkpoint in checkpoints:
+            checkpoint.release()
+
+    def _enforce_undo_memory_budget(self):
+        """
+        Geçmiş bellek bütçesini aşıyorsa en eski kontrol noktasına kadar olan komutları siler;
+        o kontrol noktası yeni başlangıç durumu olur. Mevcut durum her zaman erişilebilir kalır.
+        """
+        while self._history_byte_size() > self.undo_memory_budget:
+            base_candidates = [index for index in self._checkpoints if 0 <= index <= self.undo_index]
+            if not base_candidates:
+                break
+            new_base = min(base_candidates)
+            shift = new_base + 1
+            self._base_generation = self.command_log[new_base].generation
+            self._base_extent = self.command_log[new_base].extent
+            self._drop_history(self.command_log[:shift],
+                               [checkpoint for index, checkpoint in self._checkpoints.items() if index < new_base])
+            del self.command_log[:shift]
+            self._checkpoints = {index - shift: checkpoint for index, checkpoint in self._checkpoints.items()
+                                 if index >= new_base}
+            self.undo_index -= shift
+            _debug_print(f"Undo bütçesi aşıldı, {shift} eski komut silindi.")
+
+    def _nearest_restore_point(self, target_index):
+        """target_index'e kadar yeniden oynatmanın başlayabileceği en yakın indeks (kontrol noktası veya temizleme)."""
+        for index in range(target_index, -1, -1):
+            if index in self._checkpoints or self.command_log[index].resets_canvas():
+                return index
+        return -1
+
+    def _compress_cold_checkpoints(self):
+        """Bir sonraki undo'nun ihtiyaç duyacağı kontrol noktası dışındakileri sıkıştırma işçisine gönderir."""
+        hot_indices = {max((index for index in self._checkpoints if index <= self.undo_index), default=-1),
+                       max((index for index in self._checkpoints if index <= self.undo_index - 1), default=-1)}
+        for index, checkpoint in self._checkpoints.items():
+            if index not in hot_indices and checkpoint.claim_for_compression():
+                UndoCompressor.enqueue(checkpoint)
+
+    def _rebuild_overlay(self, target_index):
+        """En yakın kontrol noktasını geri yükler ve target_index'e kadar kalan komutları yeniden oynatır."""
+        start_index = self._nearest_restore_point(target_index)
+        if start_index in self._checkpoints:
+            # Paylaşımlı kopya: kontrol noktası ancak ilk yazmada (detach) kopyalanır, geçmiş bozulmaz
+            self._replace_overlay(QImage(self._checkpoints[start_index].image()))
+        else:
+            self._apply_command(self.command_log[start_index])
+        for index in range(start_index + 1, target_index + 1):
+            self._apply_command(self.command_log[index])
+        _debug_print(f"Tuval yeniden oluşturuldu: başlangıç {start_index}, {target_index - start_index} komut oynatıldı.")
+
+    @_timed("save_drawing_state_ms")
+    def save_drawing_state(self, command):
+        """Tuvale zaten uygulanmış bir komutu çizim belgesine (komut geçmişine) ekler."""
+        try:
+            # Mevcut indeksin ötesindeki tüm komutları ve kontrol noktalarını sil
+            self._drop_history(self.command_log[self.undo_index + 1:],
+                               [checkpoint for index, checkpoint in self._checkpoints.items()
+                                if index > self.undo_index])
+            del self.command_log[self.undo_index + 1:]
+            self._checkpoints = {index: checkpoint for index, checkpoint in self._checkpoints.items()
+                                 if index <= self.undo_index}
+
+            command.generation = self._next_generation()
+            command.extent = self._extent_after(command, self.content_extent())
+            self.command_log.append(command)
+            self._history_bytes.add(command.byte_size())
+            self.undo_index = len(self.command_log) - 1
+            self._journal_record(SessionJournal.RECORD_COMMAND, command.to_bytes())
+            self._mark_auto_save_dirty(command.bounds(self.overlay_image.rect()))
+
+            # Her N komutta bir raster kontrol noktası al (temizleme komutları zaten başlangıç noktasıdır)
+            if not command.resets_canvas() and \
+                    self.undo_index - self._nearest_restore_point(self.undo_index) >= self.UNDO_CHECKPOINT_INTERVAL:
+                self._checkpoints[self.undo_index] = self._new_checkpoint()
+
+            self._enforce_undo_memory_budget()
+            self._compress_cold_checkpoints()
+            _debug_print(f"Komut kaydedildi: {command.kind}/{command.tool}. "
+                         f"Komut sayısı: {len(self.command_log)}, Index: {self.undo_index}")
 
             # Otomatik kaydetme zamanlayıcısını yeniden başlat (debounce)
             self.auto_save_timer.start()
@@ -1009,10 +3387,14 @@ class PaintCanvasWindow(QMainWindow):
     def undo_drawing(self):
         """Son çizim eylemini geri alır."""
         try:
-            if self.undo_index > 0:
+            if self.undo_index >= 0:
+                undone_rect = self.command_log[self.undo_index].bounds(self.overlay_image.rect())
                 self.undo_index -= 1
-                self.overlay_image = self.undo_stack[self.undo_index]
-                self.update()
+                self._journal_record(SessionJournal.RECORD_UNDO)
+                self._rebuild_overlay(self.undo_index)
+                self._compress_cold_checkpoints()
+                self._mark_auto_save_dirty(undone_rect)
+                self.update(undone_rect)
                 self.auto_save_timer.start()  # Trigger auto-save debounce
             else:
                 _debug_print("Geri alınacak başka çizim yok.")
@@ -1022,10 +3404,18 @@ class PaintCanvasWindow(QMainWindow):
     def redo_drawing(self):
         """Geri alınan son çizim eylemini tekrar yapar."""
         try:
-            if self.undo_index < len(self.undo_stack) - 1:
+            if self.undo_index < len(self.command_log) - 1:
+                previous_extent = self.content_extent()
                 self.undo_index += 1
-                self.overlay_image = self.undo_stack[self.undo_index]
-                self.update()
+                self._journal_record(SessionJournal.RECORD_REDO)
+                command = self.command_log[self.undo_index]
+                self._apply_command(command)  # Tek komut doğrudan uygulanır, yeniden oynatma gerekmez
+                if command.extent is None:
+                    # Kurtarılan geçmişte henüz uygulanmamış komut: kapsamı ilk uygulamada hesaplanır
+                    command.extent = self._extent_after(command, previous_extent)
+                self._compress_cold_checkpoints()
+                self._mark_auto_save_dirty(command.bounds(self.overlay_image.rect()))
+                self.update(command.bounds(self.overlay_image.rect()))
                 self.auto_save_timer.start()  # Trigger auto-save debounce
             else:
                 _debug_print("İleri alınacak başka çizim yok.")
@@ -1037,86 +3427,129 @@ class PaintCanvasWindow(QMainWindow):
         try:
             # Explicitly make a deep copy to ensure independent memory management
             # and to prevent issues if the 'image' argument is temporary.
-            self.overlay_image = QImage(image)
-            # Yüklendikten sonra undo stack'i sıfırla ve yeni görüntüyü ilk durum olarak ekle
-            self.undo_stack = [QImage(self.overlay_image)]  # Use the newly copied overlay_image for the stack
-            self.undo_index = 0
+            self._replace_overlay(image.convertToFormat(QImage.Format_ARGB32))
+            # Yüklendikten sonra undo geçmişini sıfırla; yüklenen görüntü yeni başlangıç durumu olur
+            self._reset_undo_history()
             # Otomatik kaydetme zamanlayıcısını yeniden başlat (debounce)
             self.auto_save_timer.start()
             self.update()  # Yeni görüntüyü ekranda göstermek için güncelleme iste
         except Exception as e:
             log_error(f"Çizim katmanı görüntüsü ayarlanırken hata: {e}", sys.exc_info())
 
+    @_timed("auto_save_gui_ms")
     def _save_current_drawing_auto(self):
         """
-        Mevcut çizimi (overlay_image) Base64 kodlu PNG string olarak
-        önceden tanımlanmış otomatik kayıt dosyasına kaydeder.
+        Mevcut çizimin (overlay_image) son kayıttan bu yana değişen karolarını karo tabanlı
+        otomatik kayıt dosyasına ekler. Kodlama ve yazma bir QThreadPool işçisinde yapılır; bir kayıt sürerken gelen istekler
+        birleştirilir ve o kayıt bitince en güncel çizimle tek bir kayıt daha yapılır.
         Bu metod, auto_save_timer tarafından tetiklenir.
         """
         try:
-            # Dosya dizininin var olduğundan emin olun
-            os.makedirs(os.path.dirname(_AUTO_SAVE_DRAWING_FILE), exist_ok=True)
-
-            buffer = QBuffer()
-            buffer.open(QBuffer.WriteOnly)
-            # PNG olarak doğrudan kaydet
-            self.overlay_image.save(buffer, "PNG")
-            png_data = buffer.data()
-            buffer.close()
+            if self._auto_save_task is not None:
+                self._auto_save_pending = True  # Devam eden kayıt bitince tekrar kaydedilecek
+                return
 
-            # Doğrudan PNG baytlarını dosyaya yaz, Base64 kodlamasına gerek yok
-            with open(_AUTO_SAVE_DRAWING_FILE, 'wb') as f:  # 'wb' -> write binary
-                f.write(png_data.data())
+            generation = self._content_generation()
+            if generation == self._saved_generation:
+                # Diskteki kayıt ekrandakiyle aynı (ör. undo ardından redo): kodlama ve tarama gereksiz
+                self._auto_save_dirty_rect = QRect()
+                _debug_print(f"Otomatik kayıt atlandı, içerik değişmedi (nesil {generation}).")
+                return
 
-            has_visible_content = _check_qimage_for_visible_content(self.overlay_image)
-            _debug_print(f"Saved overlay_image contains visible content: {has_visible_content}")
-            _debug_print(
-                f"Otomatik kaydedildi. Resim Boyutu: {self.overlay_image.size().width()}x{self.overlay_image.size().height()}, PNG Boyutu: {len(png_data.data())} bytes")
+            if self.overlay_store is not None:
+                # mmap deposu: kodlama yok, yalnızca değişen sayfalar diske yazılır
+                started = time.perf_counter()
+                flushed = self.overlay_store.flush(self._auto_save_dirty_rect)
+                if _DEBUG_MODE_ENABLED:
+                    self.metrics.record("auto_save_ms", (time.perf_counter() - started) * 1000)
+                self._auto_save_dirty_rect = QRect()
+                self._saved_generation = generation
+                _debug_print(f"Otomatik kaydedildi (mmap). {flushed} bayt diske yazıldı.")
+                return
 
+            # O(1) değişmez anlık görüntü; sonraki çizimler katmanı ayırır (detach), bu görüntü değişmez
+            task = AutoSaveTask(self._snapshot_overlay(), self._auto_save_dirty_rect, self._auto_save_file,
+                                self.content_extent())
+            self._auto_save_dirty_rect = QRect()
+            # Kayıt sürerken gelen istekler, yazılmakta olan içerikle karşılaştırılsın diye hemen atanır
+            self._saved_generation = generation
+            task.setAutoDelete(False)  # Python tarafı referansı _on_auto_save_finished'e kadar tutar
+            task.signals.finished.connect(self._on_auto_save_finished)
+            self._auto_save_task = task
+            self._auto_save_pool.start(task)
         except Exception as e:
             log_error(f"Otomatik çizim kaydedilirken hata: {e}", sys.exc_info())
 
+    def _on_auto_save_finished(self, success, message, elapsed_ms):
+        """Arka plan kaydı bittiğinde GUI iş parçacığında çağrılır; bekleyen kayıt varsa başlatır."""
+        self._auto_save_task = None
+        if _DEBUG_MODE_ENABLED:
+            self.metrics.record("auto_save_ms", elapsed_ms)
+        if success:
+            _debug_print(f"Otomatik kaydedildi. {message}")
+        else:
+            # Yazılamayan karolar kaybolmasın: bir sonraki kayıtta tüm tuvali yaz
+            self._saved_generation = None
+            self._mark_auto_save_dirty(self.overlay_image.rect())
+        if self._auto_save_pending:
+            self._auto_save_pending = False
+            self._save_current_drawing_auto()
+
     def toggle_whiteboard_mode(self):
         """Toggles between normal drawing mode and whiteboard mode."""
         try:
             self.whiteboard_mode = not self.whiteboard_mode
+            clear_command = DrawCommand("clear")
             if self.whiteboard_mode:
                 # Clear existing drawings and background when entering whiteboard mode
-                self.overlay_image.fill(Qt.transparent)
+                self._apply_command(clear_command)
                 self.background_pixmap = QPixmap()  # Clear background image
                 QMessageBox.information(self, "Mod Değişikliği", "Beyaz Tahta Modu AÇIK. Arka plan temizlendi.")
             else:
                 # When exiting whiteboard mode, clear overlay but don't restore old screenshot
-                self.overlay_image.fill(Qt.transparent)
+                self._apply_command(clear_command)
                 QMessageBox.information(self, "Mod Değişikliği",
                                         "Beyaz Tahta Modu KAPALI. Tuval varsayılana döndürüldü.")
 
-            self.save_drawing_state()  # Save new state to undo stack (and trigger auto-save debounce)
+            self.save_drawing_state(clear_command)  # Save new state to undo stack (and trigger auto-save debounce)
             self.update()  # Repaint
         except Exception as e:
             log_error(f"toggle_whiteboard_mode hatası: {e}", sys.exc_info())
 
+    def _image_handle_at(self, pos):
+        """
+        pos görselin tutamaçlarından birindeyse 'resize' (sağ alt boyutlandırma tutamacı) veya 'move'
+        (üstteki 30 px taşıma şeridi), değilse None döndürür. Fare ve tablet basışları aynı sınamayı kullanır.
+        """
+        if self.background_pixmap.isNull():
+            return None
+        # Check for resize handle interaction first
+        image_rect = QRect(self.image_pos, self._image_size())
+        br_handle = QRect(
+            image_rect.bottomRight() - QPoint(self.resize_handle_size, self.resize_handle_size),
+            QSize(self.resize_handle_size, self.resize_handle_size)
+        )
+        if br_handle.contains(pos):
+            return 'resize'
+        # Only consider image handle area if not already resizing
+        image_handle_area = QRect(self.image_pos, QSize(self._image_size().width(), 30))  # 30px handle at top
+        if image_handle_area.contains(pos):
+            return 'move'
+        return None
+
     def mousePressEvent(self, event):
         """Handles mouse press events for drawing, moving, and resizing the image."""
         try:
-            # Check for resize handle interaction first
-            image_rect = QRect(self.image_pos, self.background_pixmap.size())
-            br_handle = QRect(
-                image_rect.bottomRight() - QPoint(self.resize_handle_size, self.resize_handle_size),
-                QSize(self.resize_handle_size, self.resize_handle_size)
-            )
-
-            if br_handle.contains(event.pos()) and not self.background_pixmap.isNull():
+            handle = self._image_handle_at(event.pos())
+            if handle == 'resize':
                 self.resizing = True
                 self.resize_anchor = 'bottom_right'
-                self.original_pixmap_size = self.background_pixmap.size()
+                self.original_pixmap_size = self._image_size()
                 self.setCursor(CursorManager.get_cursor("resize_br"))  # JSON'dan imleç çek
                 return
 
             # Check for image move interaction
-            # Only consider image handle area if not already resizing
-            image_handle_area = QRect(self.image_pos, QSize(self.background_pixmap.width(), 30))  # 30px handle at top
-            if image_handle_area.contains(event.pos()) and not self.background_pixmap.isNull():
+            if handle == 'move':
                 self.moving_image = True
                 self.drag_offset = event.pos() - self.image_pos
                 self.setCursor(CursorManager.get_cursor("move_active"))  # JSON'dan imleç çek
@@ -1127,7 +3560,7 @@ class PaintCanvasWindow(QMainWindow):
                 if self.space_pressed or self.active_tool == "move":
                     # Check if the click is within the current image bounds for dragging
                     # Important: check against the current image_pos, not always (0,0)
-                    image_rect = QRect(self.image_pos, self.background_pixmap.size())
+                    image_rect = QRect(self.image_pos, self._image_size())
                     if image_rect.contains(event.pos()):
                         self.moving_image = True
                         self.drag_offset = event.pos() - self.image_pos
@@ -1135,8 +3568,8 @@ class PaintCanvasWindow(QMainWindow):
                 else:  # Drawing initiated
                     self.drawing = True
                     self.last_point = event.pos()  # Initialize last_point to the actual mouse position
-                    self.last_drawn_point = event.pos()  # Initialize last_drawn_point for smoothing to current pos
                     self.temp_start_point = event.pos()  # These are now always window-relative
+                    self.temp_end_point = event.pos()  # Şekil önizlemesinin ilk yeniden boyama alanı için
 
                     # Add debug print for brush color alpha
                     _debug_print(
@@ -1144,30 +3577,12 @@ class PaintCanvasWindow(QMainWindow):
 
                     # Start QPainter for continuous drawing (pen, eraser, highlight)
                     if self.active_tool in ["pen", "eraser", "highlight"]:
-                        self.painter = QPainter(self.overlay_image)
-                        # Enable antialiasing for continuous drawing
-                        self.painter.setRenderHint(QPainter.Antialiasing, True)
-
-                        if self.active_tool == "eraser":
-                            self.painter.setCompositionMode(QPainter.CompositionMode_Clear)
-                            # Silgi kalınlığı için self.eraser_size kullan
-                            pen = QPen(Qt.transparent, self.eraser_size, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin)
-                        elif self.active_tool == "highlight":
-                            # Use SourceOver for highlight to prevent infinite brightening
-                            self.painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
-                            # Use brush_size for highlight thickness and current brush_color (with its alpha)
-                            pen = QPen(self.brush_color, self.brush_size, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin)
-                        else:  # Pen
-                            self.painter.setCompositionMode(
-                                QPainter.CompositionMode_SourceOver)  # Keep SourceOver for blending
-                            # Use the selected line style for the pen tool
-                            # Use self.brush_color which already has the correct alpha
-                            pen = QPen(self.brush_color, self.brush_size, self.line_style, Qt.RoundCap, Qt.RoundJoin)
-                        self.painter.setPen(pen)
+                        self._begin_stroke(event.localPos(), event.timestamp())
 
         except Exception as e:
             log_error(f"PaintCanvasWindow mousePressEvent hatası: {e}", sys.exc_info())
 
+    @_timed("mouse_move_ms")
     def mouseMoveEvent(self, event):
         """Handles mouse move events for drawing, moving, and resizing the image."""
         try:
@@ -1201,45 +3616,30 @@ class PaintCanvasWindow(QMainWindow):
             elif (self.space_pressed or self.active_tool == "move") and self.moving_image:
                 self.image_pos = event.pos() - self.drag_offset
                 # Recalculate and reposition the move button based on the new image_pos
-                button_x = self.image_pos.x() + (self.background_pixmap.width() - self.move_image_btn.width()) // 2
+                button_x = self.image_pos.x() + (self._image_size().width() - self.move_image_btn.width()) // 2
                 button_y = self.image_pos.y() - self.move_image_btn.height() - 10
                 self.move_image_btn.move(button_x, button_y)
                 self.update()
             elif self.drawing and (event.buttons() & Qt.LeftButton):
                 current_mouse_pos = event.pos()
+                # Şekil önizlemesinde yalnızca değişen alan yeniden boyanır (darbeler kare zamanlayıcısında boyanır)
+                dirty_rect = QRect()
 
-                if self.active_tool in ["pen", "highlight"] and self.painter:
-                    # Only apply smoothing if the flag is enabled AND smoothing_factor is > 0
-                    if self.is_smoothing_enabled and self.smoothing_factor > 0:
-                        max_smoothing_value = 10  # Matches QSpinBox max
-                        smoothing_normalized = self.smoothing_factor / max_smoothing_value
-
-                        # Calculate the new smoothed point
-                        blended_x = self.last_drawn_point.x() + (current_mouse_pos.x() - self.last_drawn_point.x()) * (
-                                    1.0 - smoothing_normalized)
-                        blended_y = self.last_drawn_point.y() + (current_mouse_pos.y() - self.last_drawn_point.y()) * (
-                                    1.0 - smoothing_normalized)
-                        new_point_smoothed = QPoint(int(blended_x), int(blended_y))
-
-                        # Always draw from the last drawn smoothed point to the newly calculated smoothed point
-                        self.painter.drawLine(self.last_drawn_point, new_point_smoothed)
-                        self.last_drawn_point = new_point_smoothed  # Update to the new smoothed point
-
-                    else:  # No smoothing, or smoothing explicitly disabled
-                        # When no smoothing, simply draw from the last actual mouse point to the current mouse point
-                        self.painter.drawLine(self.last_point, current_mouse_pos)
-                        # For no smoothing, last_drawn_point should also follow the raw mouse movement
-                        self.last_drawn_point = current_mouse_pos
-
-                elif self.active_tool == "eraser" and self.painter:
+                if self.active_tool in ["pen", "highlight", "eraser"] and self.painter:
                     # Eraser clears, so overlapping is not a concern, and precise clearing needs all movements
-                    self.painter.drawLine(self.last_point, current_mouse_pos)
+                    self._add_stroke_sample(event.localPos(), event.timestamp())
+
+                elif self.active_tool in ["line", "rect", "ellipse"]:
+                    # Şekil önizlemesi: eski önizlemeyi silmek ve yenisini çizmek için iki alanın birleşimi
+                    dirty_rect = self._segment_rect(self.temp_start_point, self.temp_end_point, self.brush_size).united(
+                        self._segment_rect(self.temp_start_point, current_mouse_pos, self.brush_size))
 
                 # Always update last_point to the current mouse position for the next event,
                 # as it represents the *actual* mouse position at this moment.
                 self.last_point = current_mouse_pos
                 self.temp_end_point = current_mouse_pos  # For shape previews
-                self.update()
+                if not dirty_rect.isEmpty():
+                    self.update(dirty_rect)
         except Exception as e:
             log_error(f"PaintCanvasWindow mouseMoveEvent hatası: {e}", sys.exc_info())
 
@@ -1249,15 +3649,19 @@ class PaintCanvasWindow(QMainWindow):
             if event.button() == Qt.LeftButton:
                 if self.resizing:
                     if not self.current_preview_rect.isNull():
-                        # Apply the actual scaling only once, on mouse release
-                        self.background_pixmap = self.background_pixmap.scaled(
-                            self.current_preview_rect.size(),
-                            Qt.KeepAspectRatio,  # Keep aspect ratio for final scale
-                            Qt.SmoothTransformation
-                        )
+                        # Apply the actual scaling only once, on mouse release: hızlı ölçekleme hemen gösterilir,
+                        # yumuşak ölçekleme bir işçide yapılıp hazır olunca yerine geçer
+                        ratio = self.background_pixmap.devicePixelRatio()
+                        logical_size = self._image_size().scaled(self.current_preview_rect.size(),
+                                                                 Qt.KeepAspectRatio)  # Keep aspect ratio for final scale
+                        pixel_size = QSize(round(logical_size.width() * ratio), round(logical_size.height() * ratio))
+                        source = self.background_pixmap.toImage()
+                        self.background_pixmap = self.background_pixmap.scaled(pixel_size, Qt.IgnoreAspectRatio,
+                                                                               Qt.FastTransformation)
+                        self.refine_background(BackgroundImageTask(_smooth_scaled, source, pixel_size), ratio)
                         # Recalculate and reposition the move button based on the new image_pos and size
                         button_x = self.image_pos.x() + (
-                                self.background_pixmap.width() - self.move_image_btn.width()) // 2
+                                self._image_size().width() - self.move_image_btn.width()) // 2
                         button_y = self.image_pos.y() - self.move_image_btn.height() - 10
                         self.move_image_btn.move(button_x, button_y)
 
@@ -1272,36 +3676,65 @@ class PaintCanvasWindow(QMainWindow):
                         CursorManager.get_cursor("move_inactive") if self.space_pressed else CursorManager.get_cursor(
                             "default"))  # JSON'dan imleç çek
                 elif self.drawing:
-                    # End continuous drawing painter if active
-                    if self.painter and self.painter.isActive():
-                        self.painter.end()
-                        self.painter = None
+                    command = self._end_stroke()
 
                     # For shapes (line, rect, ellipse), draw them once on release
                     # HIGHLIGHT removed from this list as it's now continuous
                     if self.active_tool in ["line", "rect", "ellipse"]:
-                        painter = QPainter(self.overlay_image)
-                        painter.setRenderHint(QPainter.Antialiasing, True)
-
-                        # Set normal blending for other shapes
-                        painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
-                        painter.setPen(
-                            QPen(self.brush_color, self.brush_size, self.line_style, Qt.RoundCap, Qt.RoundJoin))
-
-                        if self.active_tool == "line":
-                            painter.drawLine(self.temp_start_point, event.pos())
-                        elif self.active_tool == "rect":
-                            painter.drawRect(QRect(self.temp_start_point, event.pos()).normalized())
-                        elif self.active_tool == "ellipse":
-                            painter.drawEllipse(QRect(self.temp_start_point, event.pos()).normalized())
-                        painter.end()
-
+                        # Set normal blending for other shapes (DrawCommand SourceOver kullanır)
+                        command = DrawCommand("shape", self.active_tool, self.brush_color, self.brush_size,
+                                              self.line_style, [QPointF(self.temp_start_point), QPointF(event.pos())])
+                        self._apply_command(command)
+                        # Yalnızca şekli ve kaldırılan son önizlemeyi yeniden boya
+                        self.update(command.bounds(self.rect()).united(
+                            self._segment_rect(self.temp_start_point, self.temp_end_point, self.brush_size)))
+
+                    # Kalem/silgi darbeleri hareket sırasında zaten boyandı; tüm pencereyi yeniden boyamaya gerek yok
                     self.drawing = False  # Reset drawing flag after all operations
-                    self.update()  # Request repaint for the whole window
-                    self.save_drawing_state()  # Çizim bittikten sonra durumu kaydet (undo stack için)
+                    # Tuvali değiştiren komutu çizim belgesine kaydet (tek noktalık darbeler çizim yapmaz)
+                    if command is not None and (command.kind == "shape" or len(command.points) > 1):
+                        self.save_drawing_state(command)
         except Exception as e:
             log_error(f"PaintCanvasWindow mouseReleaseEvent hatası: {e}", sys.exc_info())
 
+    @_timed("tablet_event_ms")
+    def tabletEvent(self, event):
+        """
+        Kalem tableti girişi. Kalem/vurgulayıcı/silgi darbelerinde örnek başına basınç ve eğim kaydedilir,
+        darbe kalınlığı basınçla değişir ve yüksek örnekleme hızındaki örnekler kare başına bir kez çizilir.
+        Diğer araçlarda (şekiller, taşıma) ve görsel tutamaçlarında olay yoksayılır; Qt onu fare olayına dönüştürür.
+        """
+        try:
+            event_type = event.type()
+            tablet_stroke_active = self._current_command is not None and bool(self._current_command.pressures)
+            if event_type == QEvent.TabletPress:
+                # Tutamaçlara basış yoksayılır; Qt'nin ürettiği fare basışı boyutlandırma/taşımayı başlatır
+                if event.button() != Qt.LeftButton or self.space_pressed or \
+                        self.active_tool not in ["pen", "eraser", "highlight"] or self.drawing or \
+                        self._image_handle_at(event.pos()) is not None:
+                    event.ignore()
+                    return
+                self.drawing = True
+                self.last_point = event.pos()
+                self._begin_stroke(event.posF(), event.timestamp(), event.pressure(), (event.xTilt(), event.yTilt()))
+                _debug_print(f"Tablet darbesi başladı. Araç: {self.active_tool}, basınç: {event.pressure():.2f}")
+                event.accept()
+            elif event_type == QEvent.TabletMove and tablet_stroke_active:
+                self._add_stroke_sample(event.posF(), event.timestamp(), event.pressure(),
+                                        (event.xTilt(), event.yTilt()))
+                self.last_point = event.pos()
+                event.accept()
+            elif event_type == QEvent.TabletRelease and tablet_stroke_active:
+                command = self._end_stroke()
+                self.drawing = False
+                if len(command.points) > 1:
+                    self.save_drawing_state(command)
+                event.accept()
+            else:
+                event.ignore()
+        except Exception as e:
+            log_error(f"PaintCanvasWindow tabletEvent hatası: {e}", sys.exc_info())
+
     def keyPressEvent(self, event):
         """Handles keyboard shortcuts (Space for hand tool, Esc to close)."""
         try:
@@ -1320,6 +3753,8 @@ class PaintCanvasWindow(QMainWindow):
                 self.undo_drawing()
             elif event.key() == Qt.Key_Y and event.modifiers() == Qt.ControlModifier:  # Ctrl+Y için redo
                 self.redo_drawing()
+            elif event.key() == Qt.Key_F12 and _DEBUG_MODE_ENABLED:  # F12: performans metriklerini kaydet
+                self.dump_performance_metrics()
             else:
                 super().keyPressEvent(event)
         except Exception as e:
@@ -1338,38 +3773,154 @@ class PaintCanvasWindow(QMainWindow):
         except Exception as e:
             log_error(f"PaintCanvasWindow keyReleaseEvent hatası: {e}", sys.exc_info())
 
+    def _image_size(self):
+        """Arka plan görselinin pencere koordinatlarındaki (mantıksal) boyutu."""
+        ratio = self.background_pixmap.devicePixelRatio()
+        return QSize(round(self.background_pixmap.width() / ratio), round(self.background_pixmap.height() / ratio))
+
+    def refine_background(self, task, device_pixel_ratio):
+        """
+        Arka plan görselinin daha kaliteli sürümünü üreten işi başlatır. Sonuç, arada görsel değişmediyse
+        (yeniden boyutlandırma, beyaz tahta) GUI iş parçacığında mevcut görselin yerine geçer; eski işler yok sayılır.
+        """
+        self._background_task = task
+        self._background_task_key = self.background_pixmap.cacheKey()
+        self._background_task_ratio = device_pixel_ratio
+        # setAutoDelete(False): iş Python'a aittir. _background_task yeni bir işle veya yeni oturumda ezilse de
+        # havuz işi çalıştırırken C++ nesnesi silinmesin diye sonuç gelene kadar kümede tutulur
+        task.setAutoDelete(False)
+        self._background_tasks_in_flight.add(task)
+        task.signals.finished.connect(self._on_background_refined)
+        QThreadPool.globalInstance().start(task)
+
+    def _on_background_refined(self, task, image):
+        try:
+            self._background_tasks_in_flight.discard(task)
+            if task is not self._background_task or image.isNull():
+                return
+            self._background_task = None
+            if self.background_pixmap.cacheKey() != self._background_task_key:
+                _debug_print("Arka plan görseli değişti, yumuşak ölçeklenmiş sürüm atlandı.")
+                return
+            self.background_pixmap = _pixmap_with_ratio(image, self._background_task_ratio)
+            self.update(QRect(self.image_pos, self._image_size()))
+            _debug_print(f"Yumuşak ölçeklenmiş arka plan yerleştirildi: {image.width()}x{image.height()}")
+        except Exception as e:
+            log_error(f"Arka plan görseli güncellenirken hata: {e}", sys.exc_info())
+
+    def _canvas_screen_rects(self):
+        """
+        Pencerenin her ekrandaki alanı (pencere koordinatlarında) ve o ekranın devicePixelRatio'su;
+        hiçbir ekranla kesişmiyorsa tüm pencere.
+        """
+        geometry = self.geometry()
+        screens = QApplication.screens()
+        key = (QRect(geometry), tuple(QRect(screen.geometry()) for screen in screens))
+        if key != self._screen_rects_key:
+            rects = [(screen.geometry().intersected(geometry).translated(-geometry.topLeft()), screen.devicePixelRatio())
+                     for screen in screens]
+            self._screen_rects = [(rect, ratio) for rect, ratio in rects if not rect.isEmpty()] or \
+                [(self.rect(), self.devicePixelRatioF())]
+            self._screen_rects_key = key
+            self._backdrop_caches = {}
+        return self._screen_rects
+
+    def _backdrop(self, index):
+        """
+        index'inci ekranın alanı için, ekranın yerel biçiminde önbelleğe alınmış arka planı döndürür: gri/beyaz
+        dolgu, ekran görüntüsü, kesikli çerçeve ve kırmızı boyutlandırma tutamacı. Görselin konumu veya boyutu,
+        beyaz tahta modu, boyutlandırma durumu ya da pencere boyutu değişmedikçe yeniden çizilmez.
+        """
+        screen_rect, ratio = self._screen_rects[index]
+        key = (self.size(), QPoint(self.image_pos), self.background_pixmap.cacheKey(), self.whiteboard_mode,
+               self.resizing)
+        cached = self._backdrop_caches.get(index)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        # Ekranın piksel yoğunluğunda: HiDPI'da ekran görüntüsü tam çözünürlükte kalır
+        backdrop = QPixmap(round(screen_rect.width() * ratio), round(screen_rect.height() * ratio))
+        backdrop.setDevicePixelRatio(ratio)
+        painter = QPainter(backdrop)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.translate(-screen_rect.topLeft())  # Aşağıdaki çizimler pencere koordinatlarında
+
+        # Fill the entire canvas background with light gray or white based on whiteboard_mode
+        if self.whiteboard_mode:
+            painter.fillRect(screen_rect, Qt.white)
+        else:
+            painter.fillRect(screen_rect, QColor(245, 245, 245))
+
+        # Draw the background pixmap (if any) at its current position
+        # Only draw background pixmap if not in whiteboard mode
+        if not self.background_pixmap.isNull() and not self.whiteboard_mode:
+            painter.drawPixmap(self.image_pos, self.background_pixmap)
+
+            # Draw a dashed frame around the image if not resizing
+            image_rect = QRect(self.image_pos, self._image_size())
+            if not self.resizing:
+                frame_pen = QPen(QColor(0, 0, 0, 100), 2, Qt.DashLine)  # Slightly transparent black frame
+                painter.setPen(frame_pen)
+                painter.drawRect(image_rect)
+
+        # Always draw the resize handle if the image is present
+        if not self.background_pixmap.isNull():
+            image_rect = QRect(self.image_pos, self._image_size())
+            handle_rect = QRect(
+                image_rect.bottomRight() - QPoint(self.resize_handle_size, self.resize_handle_size),
+                QSize(self.resize_handle_size, self.resize_handle_size)
+            )
+            painter.fillRect(handle_rect, QColor(255, 0, 0, 255))  # red non-transparent box for handle
+        painter.end()
+
+        self._backdrop_caches[index] = (key, backdrop)
+        _debug_print(f"Arka plan önbelleği yeniden oluşturuldu (ekran {index}).")
+        return backdrop
+
     def paintEvent(self, event):
         """
         Draws the background screenshot and the overlay with user drawings.
         Also draws previews for shape tools and resize indicators.
         """
         try:
+            # Tüm işler yeniden boyanması istenen alanla sınırlandırılır (canlı darbelerde küçük bir dikdörtgen)
+            dirty_rect = event.rect()
+            paint_started = time.perf_counter()
             painter = QPainter(self)
             painter.setRenderHint(QPainter.Antialiasing)  # For smoother lines/shapes
 
-            # 1) Fill the entire canvas background with light gray or white based on whiteboard_mode
-            if self.whiteboard_mode:
-                painter.fillRect(self.rect(), Qt.white)
-            else:
-                painter.fillRect(self.rect(), QColor(245, 245, 245))
-
-            # 2) Draw the background pixmap (if any) at its current position
-            # Only draw background pixmap if not in whiteboard mode
-            if not self.background_pixmap.isNull() and not self.whiteboard_mode:
-                painter.drawPixmap(self.image_pos, self.background_pixmap)
-
-                # Draw a dashed frame around the image if not resizing
-                if not self.resizing:
-                    image_rect = QRect(self.image_pos, self.background_pixmap.size())
-                    frame_pen = QPen(QColor(0, 0, 0, 100), 2, Qt.DashLine)  # Slightly transparent black frame
-                    painter.setPen(frame_pen)
-                    painter.drawRect(image_rect)
+            # 1-2) Arka plan (dolgu, ekran görüntüsü, çerçeve, tutamaç) her ekranın önbelleğinden tek kopyalamayla çizilir;
+            # yalnızca yeniden boyanan alanla kesişen ekranların önbelleğine dokunulur
+            for index, (screen_rect, ratio) in enumerate(self._canvas_screen_rects()):
+                screen_dirty_rect = dirty_rect.intersected(screen_rect)
+                if not screen_dirty_rect.isEmpty():
+                    # Kaynak dikdörtgen önbelleğin cihaz piksellerinde
+                    source = screen_dirty_rect.translated(-screen_rect.topLeft())
+                    painter.drawPixmap(QRectF(screen_dirty_rect), self._backdrop(index),
+                                       QRectF(source.x() * ratio, source.y() * ratio,
+                                              source.width() * ratio, source.height() * ratio))
 
             # 3) Draw the overlay image (where persistent drawings are stored) at (0,0)
             # This covers the entire window and allows drawing anywhere, even outside the initial screenshot area
-            painter.drawImage(0, 0, self.overlay_image)
-            _debug_print(
-                f"paintEvent: overlay_image isNull: {self.overlay_image.isNull()}, Size: {self.overlay_image.size().width()}x{self.overlay_image.size().height()}, Format: {self.overlay_image.format()}")
+            painter.drawImage(dirty_rect, self.overlay_image, dirty_rect)
+            if _DEBUG_MODE_ENABLED:  # Her karede çalışır: kapalıyken metin hiç oluşturulmaz
+                _debug_print(
+                    f"paintEvent: overlay_image isNull: {self.overlay_image.isNull()}, Size: {self.overlay_image.size().width()}x{self.overlay_image.size().height()}, Format: {self.overlay_image.format()}")
+
+            # Devam eden yarı saydam darbe: yalnızca karalama görüntüsüyle kesişen alan birleştirilir
+            scratch_dirty_rect = dirty_rect.intersected(self._scratch_rect)
+            if self._scratch_image is not None and not scratch_dirty_rect.isEmpty():
+                painter.setOpacity(self._current_command.stroke_opacity())
+                painter.drawImage(scratch_dirty_rect, self._scratch_image,
+                                  scratch_dirty_rect.translated(-self._scratch_rect.topLeft()))
+                painter.setOpacity(1.0)
+
+            # Tahmin edilen darbe ucu (yalnızca ekranda; bir sonraki karede gerçek noktalarla değiştirilir)
+            if self._predicted_segment is not None and self._current_command is not None:
+                painter.setPen(self._current_command.make_pen())
+                painter.setOpacity(self._current_command.stroke_opacity())
+                painter.drawLine(self._predicted_segment)
+                painter.setOpacity(1.0)
 
             # 4) Draw preview for shape tools (line, rect, ellipse) using window-relative coordinates
             # HIGHLIGHT removed from this list as it no longer uses a shape preview
@@ -1387,23 +3938,24 @@ class PaintCanvasWindow(QMainWindow):
                 # Reset composition mode to default after drawing preview to avoid affecting other elements
                 painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
 
-            # 5) Draw the resize handle and preview rectangle if resizing is active
-            if not self.background_pixmap.isNull():
-                # Always draw the resize handle if the image is present
-                image_rect = QRect(self.image_pos, self.background_pixmap.size())
-                handle_rect = QRect(
-                    image_rect.bottomRight() - QPoint(self.resize_handle_size, self.resize_handle_size),
-                    QSize(self.resize_handle_size, self.resize_handle_size)
-                )
-                painter.fillRect(handle_rect, QColor(255, 0, 0, 255))  # red non-transparent box for handle
-
-                # Draw the preview rectangle during resizing
-                if self.resizing and not self.current_preview_rect.isNull():
-                    preview_pen = QPen(QColor(255, 165, 0, 200), 2, Qt.DashLine)  # Orange dashed line for preview
-                    painter.setPen(preview_pen)
-                    painter.drawRect(self.current_preview_rect)
+            # 5) Draw the preview rectangle if resizing is active (tutamaç arka plan önbelleğinde)
+            if not self.background_pixmap.isNull() and self.resizing and not self.current_preview_rect.isNull():
+                preview_pen = QPen(QColor(255, 165, 0, 200), 2, Qt.DashLine)  # Orange dashed line for preview
+                painter.setPen(preview_pen)
+                painter.drawRect(self.current_preview_rect)
+
+            if _DEBUG_MODE_ENABLED:
+                # Yalnızca HUD'u yenileyen boyamalar ölçümleri etkilemesin
+                if not self.HUD_RECT.contains(dirty_rect):
+                    self.metrics.record("paint_ms", (time.perf_counter() - paint_started) * 1000)
+                    self.metrics.record("repaint_area_px", dirty_rect.width() * dirty_rect.height())
+                if dirty_rect.intersects(self.HUD_RECT):
+                    self._draw_hud(painter)
 
             painter.end()  # End painter for the window
+            if self._input_pending_since is not None:
+                self.metrics.record("input_latency_ms", (time.perf_counter() - self._input_pending_since) * 1000)
+                self._input_pending_since = None
         except Exception as e:
             log_error(f"PaintCanvasWindow paintEvent hatası: {e}", sys.exc_info())
 
@@ -1424,19 +3976,18 @@ class PaintCanvasWindow(QMainWindow):
                 # This copies existing drawings to the resized canvas.
                 painter.drawImage(0, 0, self.overlay_image)
                 painter.end()
-                self.overlay_image = new_overlay_image
-                # Resize olayında undo stack'i güncelleme (genellikle gerekmez, çünkü çizimler aynı kalır)
-                # Ancak uygulamanızda yeniden boyutlandırma çizimi etkiliyorsa burada kaydetme yapılabilir.
+                self._replace_overlay(new_overlay_image)
+                # Komut geçmişi ve raster kontrol noktaları eski tuval boyutuna bağlı; geçmişi yeni boyutla sıfırla
+                self._reset_undo_history()
             super().resizeEvent(event)
         except Exception as e:
             log_error(f"PaintCanvasWindow resizeEvent hatası: {e}", sys.exc_info())
 
     def close_tool_window(self):
-        """Safely closes the associated tool window."""
+        """Safely hides the associated tool window; it is reused by the next session (bkz. PaintSessionPool)."""
         try:
             if hasattr(self, 'tool_window') and self.tool_window:
-                self.tool_window.close()
-                self.tool_window = None
+                self.tool_window.hide()
         except Exception as e:
             log_error(f"Araç penceresi kapatılırken hata: {e}", sys.exc_info())
 
@@ -1444,18 +3995,55 @@ class PaintCanvasWindow(QMainWindow):
         """
         Handles the window close event. Ensures tool window is closed,
         saves the current drawing state, and reopens the main UI window.
+        Pencere yok edilmez; oturum kaynakları bırakılıp PaintSessionPool'a geri verilir.
         """
+        if not self._session_active:
+            # Havuzda bekleyen pencere: kaydedilecek veya kapatılacak bir oturum yok
+            super().closeEvent(event)
+            return
         try:
-            # Mevcut çizim durumunu kaydet (eğer bekleyen bir auto-save varsa hemen tetikle)
-            self._save_current_drawing_auto()
+            # Mevcut çizim durumunu kaydet: süren arka plan kaydını bekle, son hali eşzamanlı yaz
             self.auto_save_timer.stop()  # Ensure timer is stopped on close
+            self._auto_save_pool.waitForDone()
+            self._auto_save_pending = False
+            try:
+                if self.overlay_store is not None:
+                    # Kapanan eşlemeye işaret eden bir katman kalmasın
+                    self.overlay_image = self.overlay_image.copy()
+                    self.overlay_store.close()
+                    self.overlay_store = None
+                elif self._session_changed() and self._content_generation() != self._saved_generation:
+                    # Hiç çizilmeyen oturum önceki kaydı boş bir tuvalle ezmesin
+                    self._auto_save_file.save(self._snapshot_overlay(), self._auto_save_dirty_rect,
+                                              self.content_extent())
+                self._auto_save_dirty_rect = QRect()
+            except Exception as e:
+                log_error(f"Otomatik çizim kaydedilirken hata: {e}", sys.exc_info())
             _debug_print("Çizim penceresi kapatılırken otomatik kaydetme tetiklendi ve zamanlayıcı durduruldu.")
 
+            self.hud_timer.stop()
+
+            # Temiz kapanış: çizim otomatik kayıtta, oturum günlüğüne artık gerek yok
+            self.journal_flush_timer.stop()
+            if self.journal is not None:
+                self.journal.close(delete=True)
+                self.journal = None
+
+            # Geçmiş ve ekran görüntüsü bekleyen pencerede bellek tutmasın; katman sonraki oturumda yerinde temizlenir
+            self._session_active = False
+            self.command_log = []
+            self._checkpoints = {}
+            self._current_command = None
+            self._scratch_image = None
+            self.background_pixmap = QPixmap()
+            self._backdrop_caches = {}
+
             self.close_tool_window()
             # Ensure the main window is reopened after this window closes
             if self.main_window_ref:
                 self.main_window_ref.show()
             super().closeEvent(event)  # Call parent's closeEvent
+            PaintSessionPool.release(self)
         except Exception as e:
             log_error(f"PaintCanvasWindow closeEvent hatası: {e}", sys.exc_info())
 
@@ -1752,6 +4340,33 @@ class ToolWindow(QWidget):
         except Exception as e:
             log_error(f"Seçili renk göstergesi güncellenirken hata: {e}", sys.exc_info())
 
+    def sync_with_paint_window(self):
+        """
+        Kontrolleri çizim penceresinin değerleriyle eşitler. Pencere havuzdan yeniden kullanıldığında
+        önceki oturumun değerleri kalmasın diye çağrılır; değer değişikliği sinyalleri tetiklenmez.
+        """
+        try:
+            for widget, value in ((self.brushSizeSpinBox, self.paint_window.brush_size),
+                                  (self.penOpacitySpinBox, self.paint_window.brush_alpha),
+                                  (self.smoothingSpinBox, self.paint_window.smoothing_factor),
+                                  (self.eraserSizeSlider, self.paint_window.eraser_size)):
+                if widget:
+                    widget.blockSignals(True)
+                    widget.setValue(value)
+                    widget.blockSignals(False)
+            if self.smoothingSpinBox and self.smoothing_enable_checkbox:
+                smoothing_enabled = self.paint_window.smoothing_factor > 0
+                self.smoothing_enable_checkbox.blockSignals(True)
+                self.smoothing_enable_checkbox.setChecked(smoothing_enabled)
+                self.smoothing_enable_checkbox.blockSignals(False)
+                self.smoothingSpinBox.setEnabled(smoothing_enabled)
+            if self.paint_window.smoothing_factor > 0:
+                self._last_smoothing_factor_value = self.paint_window.smoothing_factor
+            self.set_selected_color_indicator(self.paint_window.brush_color)
+            self._update_whiteboard_button_text()
+        except Exception as e:
+            log_error(f"Araç penceresi kontrolleri eşitlenirken hata: {e}", sys.exc_info())
+
     def set_tool(self, tool):
         """Delegates tool selection to the parent paint window."""
         try:
@@ -1899,29 +4514,61 @@ class ToolWindow(QWidget):
         """
         _debug_print("ToolWindow._load_auto_saved_drawing called (Yükle butonu).")
         try:
-            # Check if the auto-save file exists and has content
-            if not os.path.exists(_AUTO_SAVE_DRAWING_FILE) or os.path.getsize(_AUTO_SAVE_DRAWING_FILE) == 0:
-                QMessageBox.information(self, "Bilgi",
-                                        "Otomatik kaydedilen çizim dosyası bulunamadı veya boş. Lütfen önce bir çizim yapın ve kaydedilmesini bekleyin.")
-                _debug_print(
-                    f"ToolWindow._load_auto_saved_drawing: Otomatik kayıt dosyası bulunamadı veya boş: {_AUTO_SAVE_DRAWING_FILE}")
+            # Önceki oturum çöktüyse günlüğü otomatik kayıttan daha günceldir, önce onu dene. Kurtarma günlükleri
+            # yalnızca burada yeniden oynatıldıktan sonra silinir; birden fazlası varsa en yenisi kullanılır.
+            recovery_files = _recovery_journal_files()
+            if recovery_files:
+                recovered = self.paint_window.recover_from_journal(recovery_files[0])
+                os.remove(recovery_files[0])
+                if recovered:
+                    QMessageBox.information(self, "Kurtarma Tamamlandı",
+                                            "Önceki oturumun çizimi oturum günlüğünden kurtarıldı.")
+                    return
+
+            # mmap deposunda önceki oturumun depo dosyası en güncel kayıtsa onu kod çözmeden eşle
+            use_mapped_file = self.paint_window.overlay_store is not None and \
+                os.path.exists(_OVERLAY_BACKING_PREVIOUS_FILE) and \
+                (not os.path.exists(_AUTO_SAVE_TILES_FILE) or
+                 os.path.getmtime(_OVERLAY_BACKING_PREVIOUS_FILE) >= os.path.getmtime(_AUTO_SAVE_TILES_FILE))
+            if use_mapped_file and self.paint_window.load_mapped_overlay(_OVERLAY_BACKING_PREVIOUS_FILE):
+                QMessageBox.information(self, "Yükleme Tamamlandı", "Otomatik kaydedilen çizim başarıyla yüklendi.")
                 return
 
-            with open(_AUTO_SAVE_DRAWING_FILE, 'rb') as f:  # 'rb' -> read binary
-                png_data_bytes = f.read()
-            _debug_print(f"ToolWindow._load_auto_saved_drawing ile okunan PNG veri uzunluğu: {len(png_data_bytes)}")
+            # Karo tabanlı otomatik kayıt varsa onu, yoksa eski tam PNG kaydını kullan
+            if use_mapped_file:
+                # Tuval boyutu farklı: pikselleri oku, aşağıda ölçeklenir
+                auto_save_path = _OVERLAY_BACKING_PREVIOUS_FILE
+                loaded_image = MappedOverlayStore.read_image(_OVERLAY_BACKING_PREVIOUS_FILE)
+                load_success = loaded_image is not None
+                if not load_success:
+                    loaded_image = QImage()
+            elif os.path.exists(_AUTO_SAVE_TILES_FILE):
+                auto_save_path = _AUTO_SAVE_TILES_FILE
+                loaded_image = TiledAutoSaveFile.load(_AUTO_SAVE_TILES_FILE)
+                load_success = loaded_image is not None
+                if not load_success:
+                    loaded_image = QImage()
+                _debug_print(f"ToolWindow._load_auto_saved_drawing karo dosyasından yükledi, başarı: {load_success}")
+            else:
+                auto_save_path = _AUTO_SAVE_DRAWING_FILE
+                # Check if the auto-save file exists and has content
+                if not os.path.exists(_AUTO_SAVE_DRAWING_FILE) or os.path.getsize(_AUTO_SAVE_DRAWING_FILE) == 0:
+                    QMessageBox.information(self, "Bilgi",
+                                            "Otomatik kaydedilen çizim dosyası bulunamadı veya boş. Lütfen önce bir çizim yapın ve kaydedilmesini bekleyin.")
+                    _debug_print(
+                        f"ToolWindow._load_auto_saved_drawing: Otomatik kayıt dosyası bulunamadı veya boş: {_AUTO_SAVE_DRAWING_FILE}")
+                    return
 
-            if not png_data_bytes:
-                QMessageBox.information(self, "Bilgi", "Otomatik kaydedilen çizim dosyası boş.")
-                _debug_print("ToolWindow._load_auto_saved_drawing: Otomatik kaydedilen çizim dosyası boş.")
-                return
+                with open(_AUTO_SAVE_DRAWING_FILE, 'rb') as f:  # 'rb' -> read binary
+                    png_data_bytes = f.read()
+                _debug_print(f"ToolWindow._load_auto_saved_drawing ile okunan PNG veri uzunluğu: {len(png_data_bytes)}")
 
-            loaded_image = QImage()
-            # Attempt to load the QImage from the PNG byte array
-            # No Base64 decoding needed here as it's saved as raw PNG
-            load_success = loaded_image.loadFromData(QByteArray(png_data_bytes), "PNG")
-            _debug_print(
-                f"ToolWindow._load_auto_saved_drawing ile loaded_image.loadFromData başarı: {load_success}, isNull: {loaded_image.isNull()}")
+                loaded_image = QImage()
+                # Attempt to load the QImage from the PNG byte array
+                # No Base64 decoding needed here as it's saved as raw PNG
+                load_success = loaded_image.loadFromData(QByteArray(png_data_bytes), "PNG")
+                _debug_print(
+                    f"ToolWindow._load_auto_saved_drawing ile loaded_image.loadFromData başarı: {load_success}, isNull: {loaded_image.isNull()}")
 
             if load_success and not loaded_image.isNull():
                 _debug_print(
@@ -1953,7 +4600,7 @@ class ToolWindow(QWidget):
                 QMessageBox.critical(self, "Yükleme Hatası",
                                      "Otomatik kaydedilen dosya geçerli bir çizim verisi içermiyor veya bozuk.")
                 log_error(
-                    f"Otomatik kaydedilen dosya geçerli bir çizim verisi içermiyor veya bozuk: {_AUTO_SAVE_DRAWING_FILE}")
+                    f"Otomatik kaydedilen dosya geçerli bir çizim verisi içermiyor veya bozuk: {auto_save_path}")
         except Exception as e:
             QMessageBox.critical(self, "Hata", f"Otomatik çizim yüklenirken bir hata oluştu: {e}")
             log_error(f"Otomatik çizim yüklenirken hata: {e}", sys.exc_info())
@@ -0,0 +1,104 @@
+"""
+Çökme sonrası kurtarma senaryoları. Veri dosyaları geçici bir klasöre yönlendirilir, pencereler
+ekransız (offscreen) Qt ile açılır. Kullanım:
+
+    python -m unittest discover tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QEvent, QPoint, QRect, Qt
+from PyQt5.QtGui import QColor, QMouseEvent, QPixmap
+from PyQt5.QtWidgets import QApplication
+
+import movable
+
+DATA_FILE_CONSTANTS = {
+    "_AUTO_SAVE_DRAWING_FILE": "auto_saved_drawing.png",
+    "_AUTO_SAVE_TILES_FILE": "auto_saved_drawing.tiles",
+    "_SESSION_JOURNAL_FILE": "session_journal.bin",
+    "_SESSION_JOURNAL_RECOVERY_FILE": "session_journal.recover.bin",
+    "_OVERLAY_BACKING_FILE": "overlay_backing.bin",
+    "_OVERLAY_BACKING_PREVIOUS_FILE": "overlay_backing.prev.bin",
+}
+CANVAS_RECT = QRect(0, 0, 320, 240)
+
+
+def mouse_event(event_type, x, y):
+    buttons = Qt.NoButton if event_type == QEvent.MouseButtonRelease else Qt.LeftButton
+    return QMouseEvent(event_type, QPoint(x, y), Qt.LeftButton, buttons, Qt.NoModifier)
+
+
+def draw_stroke(window, points):
+    window.mousePressEvent(mouse_event(QEvent.MouseButtonPress, *points[0]))
+    for point in points[1:]:
+        window.mouseMoveEvent(mouse_event(QEvent.MouseMove, *point))
+    window.mouseReleaseEvent(mouse_event(QEvent.MouseButtonRelease, *points[-1]))
+
+
+class CrashRecoveryTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+        cls.main_window = movable.Ui()
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        for name, file_name in DATA_FILE_CONSTANTS.items():
+            patcher = mock.patch.object(movable, name, os.path.join(self.data_dir, file_name))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # 'Yükle' sonucu bildiren kutular testi beklemeye almasın
+        patcher = mock.patch.object(movable.QMessageBox, "information")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.data_dir, True)
+
+    def open_session(self):
+        background = QPixmap(CANVAS_RECT.size())
+        background.fill(QColor(10, 200, 10))
+        window = movable.PaintSessionPool.acquire(self.main_window, background, QColor(255, 0, 0), 5, CANVAS_RECT)
+        window.show()
+        return window
+
+    def crash(self, window):
+        """Pencereyi kapatmadan bırakır: günlük diskte kalır, otomatik kayıt yazılmaz."""
+        window._flush_journal()
+        window.auto_save_timer.stop()
+        window.journal_flush_timer.stop()
+        window.journal.close()
+        window.journal = None
+        window._session_active = False  # Test sonunda kapatılırsa kayıt yapmasın
+        window.hide()
+        movable.PaintSessionPool._active.discard(window)
+
+    def test_untouched_session_keeps_crashed_drawing_recoverable(self):
+        crashed = self.open_session()
+        draw_stroke(crashed, [(40, 40), (90, 90), (140, 60)])
+        self.crash(crashed)
+
+        untouched = self.open_session()  # Günlük kurtarma için saklanır
+        self.assertEqual(len(movable._recovery_journal_files()), 1)
+        untouched.close()
+        self.app.processEvents()
+        self.assertEqual(len(movable._recovery_journal_files()), 1)
+        self.assertFalse(os.path.exists(movable._AUTO_SAVE_TILES_FILE))
+
+        restored = self.open_session()
+        restored.tool_window._load_auto_saved_drawing()
+        self.assertTrue(movable._check_qimage_for_visible_content(restored.overlay_image))
+        self.assertEqual(len(restored.command_log), 1)
+        self.assertEqual(movable._recovery_journal_files(), [])
+        restored.close()
+        self.app.processEvents()
+
+
+if __name__ == "__main__":
+    unittest.main()